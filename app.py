@@ -2,16 +2,22 @@ import dash
 from dash import dcc, html, Input, Output, State, ctx
 import threading
 import json
+import os
 import copy
 from datetime import datetime
 import re
 import logging
 from urllib.parse import unquote
-import requests
-import base64
 from script import VPNConverter
 from config import GITHUB_REPO, GITHUB_TOKEN, TEMPLATE_FILE, OUTPUT_PREFIX, DOWNLOAD_DIR
 from vpn_tester import VPNTester
+from latency_stats import latency_value
+from probe_coordinator import ProbeCoordinator
+from triage import TriageRunner
+from endpoint import extract_ip_port
+from subscription import SubscriptionSource
+from result_store import ResultStore, result_key
+from node_index import PROXY_TYPES, NodeIndex, outbound_fingerprint
 from country_flag import (
     country_to_flag,
     get_country_name,
@@ -26,22 +32,14 @@ logging.basicConfig(
 )
 
 def extract_ip_port_from_account(cfg):
-    if "transport" in cfg and "path" in cfg["transport"]:
-        path = cfg["transport"]["path"]
-        m = re.match(r"/([\d\.]+)-(\d+)", path)
-        if m:
-            return m.group(1), int(m.group(2))
-        else:
-            logging.warning(f"[extract_ip_port_from_account] Path {path} in 'transport' does not match pattern /ip-port")
-    if "path" in cfg:
-        path = cfg["path"]
-        m = re.match(r"/([\d\.]+)-(\d+)", path)
-        if m:
-            return m.group(1), int(m.group(2))
-        else:
+    ip, port = extract_ip_port(cfg)
+    if not ip:
+        path = cfg.get("transport", {}).get("path") or cfg.get("path")
+        if path:
             logging.warning(f"[extract_ip_port_from_account] Path {path} does not match pattern /ip-port")
-    logging.warning(f"[extract_ip_port_from_account] No path found in node: {cfg.get('tag', str(cfg))}")
-    return None, None
+        else:
+            logging.warning(f"[extract_ip_port_from_account] No path found in node: {cfg.get('tag', str(cfg))}")
+    return ip, port
 
 def parse_tag_country_provider_from_link(link):
     m = re.search(r'#(.+)$', link)
@@ -99,32 +97,6 @@ def icmp_tcp_dotlist(stat, pulse=False):
         "display": "flex", "flexDirection": "column", "alignItems": "center", "height": "36px"
     })
 
-# --- Tambahkan fungsi upload_to_github ke VPNConverter ---
-def upload_to_github(self, config, file_name, message):
-    owner, repo = GITHUB_REPO.split("/")
-    token = GITHUB_TOKEN
-    url = f"https://api.github.com/repos/{owner}/{repo}/contents/{file_name}"
-    headers = {"Authorization": f"token {token}"}
-
-    # 1. Ambil sha file lama jika ada
-    r = requests.get(url, headers=headers)
-    sha = r.json().get("sha") if r.status_code == 200 else None
-
-    # 2. Siapkan data
-    content = base64.b64encode(json.dumps(config, indent=2, ensure_ascii=False).encode("utf-8")).decode("utf-8")
-    data = {"message": message, "content": content}
-    if sha:
-        data["sha"] = sha
-
-    r = requests.put(url, headers=headers, json=data)
-    if not r.ok:
-        logging.error(f"Gagal upload ke GitHub: {r.text}")
-        raise Exception(f"Gagal upload ke GitHub: {r.text}")
-    logging.info(f"Berhasil upload ke GitHub sebagai {file_name}")
-    return r.json()
-# Tambahkan ke class
-VPNConverter.upload_to_github = upload_to_github
-
 converter = VPNConverter(
     github_repo=GITHUB_REPO,
     github_token=GITHUB_TOKEN,
@@ -133,6 +105,11 @@ converter = VPNConverter(
     download_dir=DOWNLOAD_DIR
 )
 tester = VPNTester()
+# Hasil test terakhir per outbound, umur maksimal lewat env RETEST_MAX_AGE (detik)
+result_store = ResultStore()
+# Import besar (puluhan ribu link) diparse di process pool, sisanya cukup di proses ini
+CONVERT_PROCESSES = int(os.environ.get("CONVERT_PROCESSES", os.cpu_count() or 1))
+CONVERT_POOL_MIN_LINKS = 20000
 
 app = dash.Dash(
     __name__,
@@ -260,40 +237,58 @@ def start_batch_test(configs, tag_list, provider_list, country_list):
     progress_state["last_progress"] = -1
 
     def run():
-        for idx, (cfg, tag, provider, country) in enumerate(filtered):
-            ip, port = extract_ip_port_from_account(cfg)
-            try:
-                logging.info(f"[start_batch_test:thread] Test node #{idx+1}: {ip}:{port} ({tag})")
-                test_result = tester.test_connection((ip, port))
-                logging.info(f"[start_batch_test:thread] Hasil test node #{idx+1}: {test_result}")
-            except Exception as e:
-                logging.error(f"[start_batch_test:thread] Error test node #{idx+1}: {e}")
-                test_result = {
-                    'ip': ip, 'port': port, 'provider': provider, 'country': country,
-                    'icmp': '❌', 'tcp_443': '❌', 'tcp_custom': '❌', 'latency': 'N/A', 'status': '❌ DEAD', 'tag': tag
-                }
+        targets = [extract_ip_port_from_account(cfg) for cfg, _, _, _ in filtered]
+        configs = [f[0] for f in filtered]
+        # Outbound yang tidak berubah dan hasil test-nya masih segar tidak dites ulang
+        fresh, todo = result_store.partition(configs)
+        logging.info(f"[start_batch_test:thread] {len(fresh)} hasil dipakai ulang, test {len(todo)} node sekaligus")
+
+        def record(idx, test_result):
+            cfg, tag, provider, country = filtered[idx]
+            ip, port = targets[idx]
+            logging.info(f"[start_batch_test:thread] Hasil test node #{idx+1} ({tag}): {test_result}")
             test_result['ip'] = ip
             test_result['port'] = port
             test_result['provider'] = provider if provider else "-"
             test_result['country'] = country if country else "-"
             test_result['tag'] = tag if tag else "-"
             progress_state["results"][idx] = (cfg, test_result)
-            progress_state["progress"] = idx + 1
+            progress_state["progress"] += 1
+
+        for idx, test_result in fresh.items():
+            test_result['cached'] = True
+            record(idx, test_result)
+        coordinator = ProbeCoordinator(tester)
+        # Fase 1 pre-screen connect cepat, fase 2 (geo, latency, protokol TLS/WS) hanya untuk yang merespon
+        triage = TriageRunner(tester)
+        for j, test_result in triage.run([targets[i] for i in todo], [configs[i] for i in todo], coordinator):
+            idx = todo[j]
+            result_store.put(result_key(configs[idx]), test_result)
+            record(idx, test_result)
+        result_store.save()
+        triage.log_stats("[start_batch_test:thread]")
+        coordinator.log_stats("[start_batch_test:thread]")
         progress_state["running"] = False
         progress_state["json_results"] = [t[1] for t in progress_state["results"] if isinstance(t, tuple) and t is not None and len(t) == 2]
         logging.info("[start_batch_test:thread] Batch test selesai.")
 
     threading.Thread(target=run, daemon=True).start()
 
+def rekom_score(result):
+    # Median latency + p90 dan loss sebagai penalti, supaya node yang cepat tapi tidak stabil tidak terpilih
+    median = latency_value(result, 9999)
+    p90 = result.get('latency_p90') or median
+    loss = result.get('loss') or 0
+    return median + (p90 - median) * 0.5 + loss * 1000
+
 def make_stat_and_rekom(results):
     live = [r for r in results if r['status'] == '✅ LIVE']
-    avg_latency = (
-        sum(float(r['latency'].split()[0].replace(",", ".")) for r in live if r['latency'] != 'N/A') / max(1, len(live))
-        if live else 0.0
-    )
+    latencies = [latency_value(r) for r in live]
+    latencies = [l for l in latencies if l is not None]
+    avg_latency = sum(latencies) / max(1, len(latencies)) if live else 0.0
     rekom = None
     if live:
-        rekom = min(live, key=lambda x: float(x['latency'].split()[0].replace(",", ".")) if x['latency'] != 'N/A' else 9999)
+        rekom = min(live, key=rekom_score)
     return {
         "live_count": len(live),
         "total": len(results),
@@ -393,10 +388,16 @@ def main_callback(preview_click, interval_n, upload_click, download_click, downl
         semua = base_config.get("outbounds", [])
         akun_lama = [o for o in semua if o.get("type") in ["trojan", "vless", "vmess"]]
         user_links = [l.strip() for l in (vpn_links or "").splitlines() if l.strip()]
+        # Baris berupa URL http(s) dianggap subscription feed dan diganti isi feed-nya
+        feed_urls = [l for l in user_links if l.startswith(("http://", "https://"))]
+        if feed_urls:
+            user_links = [l for l in user_links if l not in feed_urls]
+            user_links.extend(SubscriptionSource(feed_urls).links(conditional=False))
 
         akun_baru, tag_baru, provider_baru, country_baru = [], [], [], []
-        for l in user_links:
-            o = converter.convert_link_to_singbox_outbound(l)
+        for i, o, error in converter.convert_many(
+                user_links, processes=CONVERT_PROCESSES if len(user_links) >= CONVERT_POOL_MIN_LINKS else None):
+            l = user_links[i]
             if o:
                 tag, country_code, provider = parse_tag_country_provider_from_link(l)
                 if provider.strip().upper() == "IL" or country_code.strip().upper() == "IL":
@@ -408,7 +409,7 @@ def main_callback(preview_click, interval_n, upload_click, download_click, downl
                 provider_baru.append(provider)
                 country_baru.append(country_code)
             else:
-                logging.warning(f"[main_callback] Gagal convert link: {l}")
+                logging.warning(f"[main_callback] Gagal convert link: {l} ({error})")
 
         filtered_lama, tag_lama, provider_lama, country_lama = [], [], [], []
         for o in akun_lama:
@@ -425,12 +426,16 @@ def main_callback(preview_click, interval_n, upload_click, download_click, downl
             tag_lama.append(tag if tag else "VPN")
             provider_lama.append(provider)
             country_lama.append(country)
-        configs_to_test = filtered_lama + akun_baru
-        orig_tags = tag_lama + tag_baru
-        orig_providers = provider_lama + provider_baru
-        orig_countries = country_lama + country_baru
-
-        logging.info(f"[main_callback] Akan dites total {len(configs_to_test)} node. {len(filtered_lama)} lama, {len(akun_baru)} baru.")
+        # Node yang sama (server/port/kredensial/transport) dengan tag beda cukup dites dan disimpan sekali
+        index = NodeIndex()
+        for cfg, tag in zip(filtered_lama + akun_baru, tag_lama + tag_baru):
+            index.add(cfg, tag)
+        configs_to_test = [cfg for cfg, _ in index.nodes()]
+        orig_tags = [tag for _, tag in index.nodes()]
+        orig_providers = [cfg.get("provider") or "-" for cfg in configs_to_test]
+        orig_countries = [cfg.get("country") or "-" for cfg in configs_to_test]
+
+        logging.info(f"[main_callback] Akan dites total {len(configs_to_test)} node. {len(filtered_lama)} lama, {len(akun_baru)} baru, {index.duplicates} duplikat digabung.")
         for cfg in configs_to_test:
             logging.info(f"[main_callback] Node: {cfg.get('tag', '-')} path: {cfg.get('path', '-')}, transport.path: {cfg.get('transport', {}).get('path', '-')}")
         progress_state["file_name"] = file_name
@@ -458,6 +463,8 @@ def main_callback(preview_click, interval_n, upload_click, download_click, downl
 
         if not prog["running"]:
             final_nodes = []
+            node_scores = {}
+            final_fps = set()
             for i, (cfg, stat) in enumerate([r for r in prog["results"] if isinstance(r, tuple) and r is not None and len(r) == 2]):
                 if not stat:
                     continue
@@ -473,29 +480,40 @@ def main_callback(preview_click, interval_n, upload_click, download_click, downl
                 if provider.strip().upper() == "IL" or country.strip().upper() == "IL":
                     continue
                 if stat['status'] == '✅ LIVE':
+                    final_fps.add(outbound_fingerprint(cfg))
                     node = cfg.copy()
                     node["provider"] = provider
                     node["country"] = country
                     node["tag"] = tag
+                    node_scores[id(node)] = rekom_score(stat)
                     if "path" in node:
                         del node["path"]
                     final_nodes.append(node)
 
             def node_priority(node):
+                # Dalam satu grup negara, node dengan latency stabil paling rendah di depan
                 tag = node.get("tag", "")
+                score = node_scores.get(id(node), 9999)
                 if tag.startswith("🇮🇩"):
-                    return (0, tag)
+                    return (0, score, tag)
                 elif tag.startswith("🇸🇬"):
-                    return (1, tag)
+                    return (1, score, tag)
                 else:
-                    return (2, tag)
+                    return (2, score, tag)
             final_nodes_sorted = sorted(final_nodes, key=node_priority)
             final_nodes_sorted = format_and_clean_nodes(final_nodes_sorted)
 
             original_outbounds = prog["base_config"].get("outbounds", [])
             new_outbounds = []
             inserted = False
+            seen = set()
             for outbound in original_outbounds:
+                if outbound.get("type") in PROXY_TYPES:
+                    fp = outbound_fingerprint(outbound)
+                    # Node yang lolos test masuk lagi lewat final_nodes, duplikat lama dibuang
+                    if fp in final_fps or fp in seen:
+                        continue
+                    seen.add(fp)
                 new_outbounds.append(outbound)
             if not inserted:
                 new_outbounds.extend(final_nodes_sorted)
@@ -557,9 +575,11 @@ def main_callback(preview_click, interval_n, upload_click, download_click, downl
             file_name = progress_state.get("file_name", "vpn_config.json")
             config_to_upload = progress_state.get("final_config", {}) or progress_state.get("base_config", {})
             if config_to_upload:
-                converter.upload_to_github(config_to_upload, file_name, "update vpn config")
+                result = converter.upload_to_github(config_to_upload, file_name, "update vpn config")
+                msg = f"Tidak ada perubahan, {file_name} tidak diupload ulang" if result.get("skipped") \
+                    else f"Berhasil upload ke GitHub: {file_name}"
                 return dash.no_update, dash.no_update, dash.no_update, html.Div(
-                    f"Berhasil upload ke GitHub: {file_name}", style={"color": "green"}
+                    msg, style={"color": "green"}
                 ), None, None, True
             else:
                 return dash.no_update, dash.no_update, dash.no_update, html.Div(
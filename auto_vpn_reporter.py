@@ -6,6 +6,12 @@ from apscheduler.schedulers.background import BackgroundScheduler
 from script import VPNConverter
 from config import GITHUB_REPO, GITHUB_TOKEN, TEMPLATE_FILE, OUTPUT_PREFIX, DOWNLOAD_DIR
 from vpn_tester import VPNTester
+from probe_engine import MODE_LIVENESS
+from probe_coordinator import ProbeCoordinator
+from circuit_breaker import EndpointHealth, endpoint_key
+from distributed import DistributedProber
+from endpoint import extract_ip_port
+from node_index import NodeIndex, outbound_fingerprint
 from country_flag import country_to_flag
 
 TELEGRAM_BOT_TOKEN = os.environ["TELEGRAM_BOT_TOKEN"]
@@ -25,24 +31,14 @@ converter = VPNConverter(
     download_dir=DOWNLOAD_DIR,
 )
 tester = VPNTester()
+health = EndpointHealth()
+# PROBE_WORKERS="host:port,host:port" -> probe dibagi ke worker (python distributed.py worker)
+PROBE_WORKERS = [w.strip() for w in os.environ.get("PROBE_WORKERS", "").split(",") if w.strip()]
+prober = DistributedProber(PROBE_WORKERS) if PROBE_WORKERS else tester
 
 def extract_ip_port_from_account(cfg):
-    # Prioritaskan real_server/real_port (patch untuk support IP di path)
-    if "real_server" in cfg and "real_port" in cfg:
-        return cfg["real_server"], cfg["real_port"]
-    if "transport" in cfg and "path" in cfg["transport"]:
-        path = cfg["transport"]["path"]
-        import re
-        m = re.match(r"/([\d\.]+)-(\d+)", path)
-        if m:
-            return m.group(1), int(m.group(2))
-    if "path" in cfg:
-        path = cfg["path"]
-        import re
-        m = re.match(r"/([\d\.]+)-(\d+)", path)
-        if m:
-            return m.group(1), int(m.group(2))
-    return None, None
+    # Urutan prioritas real_server -> transport.path -> path, lihat endpoint.py
+    return extract_ip_port(cfg)
 
 def send_telegram_message(msg):
     url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
@@ -61,22 +57,52 @@ def send_telegram_message(msg):
 
 def scheduled_report():
     logging.info("Laporan hasil test node (semua node dengan IP/port di path):")
-    files = converter.get_github_files()
-    for fname in files:
+    # Satu request tree; blob yang tidak berubah diambil dari cache
+    configs = converter.load_github_configs()
+    # Node yang sama di beberapa file cukup dilaporkan sekali, di file pertama yang memuatnya
+    index = NodeIndex.from_configs(configs)
+    if index.duplicates:
+        logging.info(f"[scheduled_report] {index.duplicates} node duplikat di {len(configs)} file, dilaporkan sekali")
+    reported = set()
+    # Endpoint yang sama di beberapa node/file cukup diprobe sekali per siklus
+    coordinator = ProbeCoordinator(prober)
+    # Hasil dicatat ke circuit breaker sekali per endpoint di akhir siklus
+    outcomes = {}
+    for fname, config in configs.items():
         try:
-            config = converter.get_file_from_github(fname)
             akun_lama = [o for o in config.get("outbounds", []) if o.get("type") in ["trojan", "vless", "vmess"]]
             notif_lines = [f"<b>File: {fname}</b>"]
             print(f"\n=== File: {fname} ===")
+            nodes, targets = [], []
+            skipped = set()
             for node in akun_lama:
+                fp = outbound_fingerprint(node)
+                if fp in reported:
+                    skipped.add(index.get(fp)["sources"][0])
+                    continue
+                reported.add(fp)
                 ip, port = extract_ip_port_from_account(node)
                 if not ip or not port:
                     continue  # skip yang tidak ada IP/port di path
+                nodes.append(node)
+                targets.append((ip, port))
+            # Semua node dalam file dites sekaligus, laporan tetap urut sesuai config.
+            # Endpoint yang breaker-nya terbuka (mati berturut-turut) dilewati sampai jadwal retest.
+            results = [None] * len(targets)
+            probe_idx = [i for i, (ip, port) in enumerate(targets) if health.should_probe(endpoint_key(ip, port))]
+            for i in set(range(len(targets))) - set(probe_idx):
+                ip, port = targets[i]
+                failures = health.get(endpoint_key(ip, port))["failures"]
+                results[i] = {"status": f"⏸ DEAD ({failures}x, ditunda)", "latency": "-"}
+            # Laporan tiap menit cukup cek liveness (berhenti di port pertama yang connect)
+            for j, result in coordinator.test_many([targets[i] for i in probe_idx], mode=MODE_LIVENESS):
+                results[probe_idx[j]] = result
+                outcomes[endpoint_key(*targets[probe_idx[j]])] = result.get("status") == "✅ LIVE"
+            for node, (ip, port), result in zip(nodes, targets, results):
                 provider = node.get('provider', '-') or '-'
                 country = node.get('country', '-') or '-'
                 tag = node.get('tag', '-') or '-'
                 try:
-                    result = tester.test_connection((ip, port))
                     flag = country_to_flag(country)
                     status = result.get("status", "-")
                     latency = result.get("latency", "-")
@@ -90,6 +116,8 @@ def scheduled_report():
                     notif_lines.append(
                         f"{provider} | <code>{ip}</code> | {tag} | <b>ERROR</b>: {e}"
                     )
+            if skipped:
+                notif_lines.append(f"<i>Node duplikat tidak diulang, sudah dilaporkan di: {', '.join(sorted(skipped))}</i>")
             notif_msg = "\n".join(notif_lines)
             # Jika node terlalu banyak, batasi panjang pesan agar tidak error
             if len(notif_msg) > 4000:
@@ -98,6 +126,12 @@ def scheduled_report():
         except Exception as e:
             logging.error(f"ERROR membaca config {fname}: {e}")
             send_telegram_message(f"❌ ERROR membaca config <b>{fname}</b>: {e}")
+    coordinator.log_stats("[scheduled_report]")
+    for key, ok in outcomes.items():
+        health.record(key, ok)
+    health.save()
+    logging.info(f"[scheduled_report] {len(outcomes)} endpoint dites, breaker terbuka: "
+                 f"{sum(1 for e in health.state.values() if e.get('breaker') == 'open')}")
 
 if __name__ == "__main__":
     scheduler = BackgroundScheduler()
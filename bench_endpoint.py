@@ -0,0 +1,70 @@
+"""
+Micro-benchmark ekstraksi endpoint: regex inline lama vs endpoint.extract_ip_port.
+
+    python bench_endpoint.py [jumlah_node]
+"""
+import random
+import re
+import sys
+import time
+
+import endpoint
+
+
+def old_extract(cfg):
+    # Versi lama di app.py: pola dikompilasi ulang (lewat cache re) tiap panggilan
+    path = cfg.get("transport", {}).get("path")
+    if path:
+        m = re.match(r"/([\d\.]+)-(\d+)", path)
+        if m:
+            return m.group(1), int(m.group(2))
+    path = cfg.get("path")
+    if path:
+        m = re.match(r"/([\d\.]+)-(\d+)", path)
+        if m:
+            return m.group(1), int(m.group(2))
+    return None, None
+
+
+def make_nodes(n, unique_ratio=0.3):
+    rnd = random.Random(1)
+    pool = []
+    for _ in range(max(1, int(n * unique_ratio))):
+        ip = ".".join(str(rnd.randint(1, 254)) for _ in range(4))
+        path = f"/{ip}-{rnd.choice([443, 8443, 2053])}"
+        if rnd.random() < 0.5:
+            pool.append({"type": "vless", "server": "cdn.example.com", "server_port": 443,
+                         "transport": {"type": "ws", "path": path}})
+        else:
+            pool.append({"type": "trojan", "server": "cdn.example.com", "server_port": 443, "path": path})
+    return [dict(rnd.choice(pool)) for _ in range(n)]
+
+
+def bench(label, fn, nodes, rounds=5):
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for node in nodes:
+            fn(node)
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<22} {best * 1e3:8.2f} ms  {best / len(nodes) * 1e6:6.2f} µs/node")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    nodes = make_nodes(n)
+    for node in nodes:
+        assert old_extract(node) == endpoint.extract_ip_port(node)
+    print(f"{n} node")
+    bench("regex inline (lama)", old_extract, nodes)
+
+    def cold(node):
+        endpoint._resolve_fingerprint.cache_clear()
+        return endpoint.extract_ip_port(node)
+    bench("endpoint (tanpa memo)", cold, nodes)
+    endpoint._resolve_fingerprint.cache_clear()
+    bench("endpoint (memo)", endpoint.extract_ip_port, nodes)
+
+
+if __name__ == "__main__":
+    main()
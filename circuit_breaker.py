@@ -0,0 +1,92 @@
+import json
+import os
+import random
+import threading
+import time
+
+DEFAULT_HEALTH_FILE = os.environ.get("HEALTH_STATE_FILE", "health_state.json")
+
+CLOSED = "closed"
+OPEN = "open"
+
+
+def endpoint_key(ip, port):
+    return f"{ip}:{port}"
+
+
+class EndpointHealth:
+    """
+    Status kesehatan per endpoint dengan circuit breaker.
+    Setelah `failure_threshold` gagal berturut-turut breaker terbuka dan
+    endpoint baru dites lagi setelah backoff eksponensial (+ jitter).
+    Sukses pertama menutup breaker dan endpoint kembali dites tiap siklus.
+    State disimpan ke file JSON supaya tetap ada setelah restart.
+    """
+
+    def __init__(self, path=DEFAULT_HEALTH_FILE, failure_threshold=3, base_backoff=120,
+                 max_backoff=6 * 3600, jitter=0.2):
+        self.path = path
+        self.failure_threshold = failure_threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self._lock = threading.Lock()
+        self.state = {}
+        self.load()
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self.state = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Gagal membaca state health {self.path}: {e}")
+            self.state = {}
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            data = json.dumps(self.state)
+        tmp = f"{self.path}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"Gagal menyimpan state health {self.path}: {e}")
+
+    def get(self, key):
+        with self._lock:
+            return dict(self.state.get(key) or {"breaker": CLOSED, "failures": 0})
+
+    def should_probe(self, key, now=None):
+        now = now or time.time()
+        with self._lock:
+            entry = self.state.get(key)
+            if not entry or entry.get("breaker") != OPEN:
+                return True
+            return now >= entry.get("next_retry", 0)
+
+    def _backoff(self, failures):
+        delay = self.base_backoff * 2 ** max(0, failures - self.failure_threshold)
+        delay = min(self.max_backoff, delay)
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def record(self, key, ok, now=None):
+        now = now or time.time()
+        with self._lock:
+            entry = self.state.setdefault(key, {"breaker": CLOSED, "failures": 0})
+            entry["last_checked"] = now
+            if ok:
+                entry.update({"breaker": CLOSED, "failures": 0, "last_ok": now})
+                entry.pop("next_retry", None)
+                entry.pop("opened_at", None)
+                return
+            entry["failures"] = entry.get("failures", 0) + 1
+            if entry["failures"] >= self.failure_threshold:
+                if entry.get("breaker") != OPEN:
+                    entry["opened_at"] = now
+                entry["breaker"] = OPEN
+                entry["next_retry"] = now + self._backoff(entry["failures"])
@@ -0,0 +1,206 @@
+"""
+Mode coordinator/worker untuk test node di banyak proses atau host.
+
+Worker:       python distributed.py worker --listen 0.0.0.0:9500
+Coordinator:  DistributedProber([("10.0.0.2", 9500), ...]).test_many(targets)
+
+Protokol: JSON per baris lewat TCP. Coordinator mengirim
+{"shard": id, "targets": [[ip, port], ...], "mode": "full"}; worker membalas
+{"shard": id, "index": i, "result": {...}} per target begitu selesai, lalu
+{"shard": id, "done": true}. Kalau worker putus, target yang belum selesai
+dimasukkan lagi ke antrian untuk worker lain.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import socket
+import subprocess
+import sys
+import time
+
+from probe_engine import MODE_FULL, empty_result, iter_async
+
+READ_TIMEOUT = 60
+
+
+def parse_address(text):
+    host, _, port = text.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+async def serve_worker(host, port, tester=None):
+    """Jalankan worker: terima shard dari coordinator dan stream hasilnya balik."""
+    if tester is None:
+        from vpn_tester import VPNTester
+        tester = VPNTester()
+
+    async def handle(reader, writer):
+        peer = writer.get_extra_info("peername")
+        logging.info(f"[worker] Coordinator terhubung: {peer}")
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                request = json.loads(line)
+                shard = request["shard"]
+                targets = [tuple(t) for t in request["targets"]]
+                async for idx, result in tester.engine.probe_many(targets, request.get("concurrency"),
+                                                                  request.get("mode", MODE_FULL)):
+                    writer.write((json.dumps({"shard": shard, "index": idx, "result": result}) + "\n").encode())
+                    await writer.drain()
+                writer.write((json.dumps({"shard": shard, "done": True}) + "\n").encode())
+                await writer.drain()
+        except (ConnectionError, ValueError, KeyError) as e:
+            logging.warning(f"[worker] Koneksi {peer} berhenti: {e}")
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    logging.info(f"[worker] Listening di {host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+class DistributedProber:
+    """
+    Coordinator: bagi target ke beberapa worker dalam shard, gabungkan hasil
+    yang di-stream balik, dan re-queue shard dari worker yang hilang.
+    Punya test_many() dengan signature sama seperti VPNTester, jadi bisa
+    dipakai langsung oleh ProbeCoordinator.
+    """
+
+    def __init__(self, workers, shard_size=200, shards_per_worker=2, connect_timeout=5,
+                 read_timeout=READ_TIMEOUT):
+        self.workers = [parse_address(w) if isinstance(w, str) else tuple(w) for w in workers]
+        self.shard_size = shard_size
+        self.shards_per_worker = shards_per_worker
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.requeued = 0
+
+    async def probe_many(self, targets, concurrency=None, mode=MODE_FULL):
+        """Async generator: yield (index, result) sesuai urutan selesai."""
+        targets = list(targets)
+        pending = asyncio.Queue()
+        for start in range(0, len(targets), self.shard_size):
+            pending.put_nowait(list(range(start, min(start + self.shard_size, len(targets)))))
+        out = asyncio.Queue()
+        remaining = set(range(len(targets)))
+        shard_ids = iter(range(1 << 30))
+
+        async def lane(address):
+            try:
+                reader, writer = await asyncio.wait_for(asyncio.open_connection(*address), self.connect_timeout)
+            except (OSError, asyncio.TimeoutError) as e:
+                logging.warning(f"[distributed] Worker {address} tidak bisa dihubungi: {e}")
+                return
+            try:
+                while remaining:
+                    try:
+                        indices = pending.get_nowait()
+                    except asyncio.QueueEmpty:
+                        await asyncio.sleep(0.05)
+                        continue
+                    shard = next(shard_ids)
+                    open_idx = set(indices)
+                    try:
+                        writer.write((json.dumps({
+                            "shard": shard, "mode": mode, "concurrency": concurrency,
+                            "targets": [list(targets[i]) for i in indices]
+                        }) + "\n").encode())
+                        await writer.drain()
+                        while True:
+                            line = await asyncio.wait_for(reader.readline(), self.read_timeout)
+                            if not line:
+                                raise ConnectionError("worker menutup koneksi")
+                            msg = json.loads(line)
+                            if msg.get("done"):
+                                break
+                            pos = msg["index"]
+                            if not isinstance(pos, int) or not 0 <= pos < len(indices):
+                                raise ValueError(f"index tidak valid dari worker: {pos!r}")
+                            idx = indices[pos]
+                            if idx in open_idx:
+                                open_idx.discard(idx)
+                                await out.put((idx, msg["result"]))
+                        if open_idx:
+                            raise ValueError(f"shard selesai tanpa {len(open_idx)} hasil")
+                    except (OSError, ValueError, KeyError, IndexError, TypeError,
+                            ConnectionError, asyncio.TimeoutError) as e:
+                        if open_idx:
+                            logging.warning(f"[distributed] Worker {address} hilang ({e}), "
+                                            f"{len(open_idx)} target di-requeue")
+                            self.requeued += len(open_idx)
+                            pending.put_nowait(sorted(open_idx))
+                        return
+            finally:
+                writer.close()
+
+        lanes = [asyncio.ensure_future(lane(address))
+                 for address in self.workers for _ in range(self.shards_per_worker)]
+        try:
+            while remaining:
+                getter = asyncio.ensure_future(out.get())
+                alive = [l for l in lanes if not l.done()]
+                done, _ = await asyncio.wait([getter] + alive, return_when=asyncio.FIRST_COMPLETED)
+                if getter in done:
+                    idx, result = getter.result()
+                    if idx in remaining:
+                        remaining.discard(idx)
+                        yield idx, result
+                    continue
+                getter.cancel()
+                if all(l.done() for l in lanes) and out.empty():
+                    # Semua worker hilang: sisa target dilaporkan gagal
+                    logging.error(f"[distributed] Tidak ada worker tersisa, {len(remaining)} target tidak dites")
+                    for idx in sorted(remaining):
+                        yield idx, empty_result(*targets[idx])
+                    remaining.clear()
+        finally:
+            for l in lanes:
+                l.cancel()
+
+    def test_many(self, targets, max_in_flight=None, mode=MODE_FULL):
+        targets = list(targets)
+        return iter_async(lambda: self.probe_many(targets, max_in_flight, mode))
+
+
+def wait_for_worker(proc, host, port, timeout=10.0):
+    """Tunggu sampai port worker menerima koneksi. Return False kalau proses mati / timeout."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            return False
+        try:
+            socket.create_connection((host, port), timeout=0.5).close()
+            return True
+        except OSError:
+            time.sleep(0.05)
+    return False
+
+
+def spawn_local_workers(count, base_port=9500, host="127.0.0.1", timeout=10.0):
+    """Jalankan beberapa worker lokal (untuk satu mesin / testing). Return (procs, addresses)."""
+    procs, addresses = [], []
+    for i in range(count):
+        address = f"{host}:{base_port + i}"
+        procs.append(subprocess.Popen([sys.executable, __file__, "worker", "--listen", address]))
+        addresses.append(address)
+    for i, proc in enumerate(procs):
+        if not wait_for_worker(proc, host, base_port + i, timeout):
+            logging.warning(f"[distributed] Worker {host}:{base_port + i} belum siap setelah {timeout} detik")
+    return procs, addresses
+
+
+if __name__ == "__main__":
+    logging.basicConfig(format="%(asctime)s [%(levelname)s] %(message)s", level=logging.INFO)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("role", choices=["worker"])
+    parser.add_argument("--listen", default="0.0.0.0:9500")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve_worker(*parse_address(args.listen)))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,119 @@
+import re
+import socket
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+IPV4_RE = re.compile(r'^\d{1,3}(?:\.\d{1,3}){3}$')
+
+
+def system_resolver(host):
+    return socket.gethostbyname(host)
+
+
+class DNSCache:
+    """
+    Resolver dengan cache TTL, negative caching (host yang gagal tidak
+    di-resolve ulang selama negative_ttl), dan coalescing: beberapa thread
+    yang minta host yang sama menunggu satu lookup yang sama.
+    `resolver` bisa diganti (mis. stand-in lokal untuk test): callable(host) -> ip,
+    raise OSError kalau gagal.
+    """
+
+    def __init__(self, resolver=system_resolver, ttl=300, negative_ttl=60, max_workers=32):
+        self.resolver = resolver
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_workers = max_workers
+        self._cache = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._pool = None
+
+    def _lookup(self, host, fut):
+        try:
+            ip = self.resolver(host)
+        except Exception:
+            ip = None
+        ttl = self.ttl if ip else self.negative_ttl
+        with self._lock:
+            self._cache[host] = (ip, time.monotonic() + ttl)
+            self._inflight.pop(host, None)
+        fut.set_result(ip)
+
+    def _get_or_start(self, host, run_inline):
+        """Return (future, perlu_dijalankan_oleh_caller)."""
+        with self._lock:
+            cached = self._cache.get(host)
+            if cached and cached[1] > time.monotonic():
+                fut = Future()
+                fut.set_result(cached[0])
+                return fut, False
+            fut = self._inflight.get(host)
+            if fut is not None:
+                return fut, False
+            fut = Future()
+            self._inflight[host] = fut
+            if not run_inline:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="dns")
+                self._pool.submit(self._lookup, host, fut)
+            return fut, run_inline
+
+    def resolve(self, host):
+        """Return IP (string) atau None kalau gagal."""
+        if not host:
+            return None
+        if IPV4_RE.match(host):
+            return host
+        fut, mine = self._get_or_start(host, run_inline=True)
+        if mine:
+            self._lookup(host, fut)
+        return fut.result()
+
+    def resolve_many(self, hosts):
+        """Resolve banyak host sekaligus secara paralel. Return {host: ip atau None}."""
+        futures = {}
+        for host in dict.fromkeys(h for h in hosts if h):
+            if IPV4_RE.match(host):
+                futures[host] = None
+            else:
+                futures[host] = self._get_or_start(host, run_inline=False)[0]
+        return {h: (h if f is None else f.result()) for h, f in futures.items()}
+
+    def prime(self, mapping):
+        """Isi cache dari hasil resolve di tempat lain ({host: ip atau None})."""
+        now = time.monotonic()
+        with self._lock:
+            for host, ip in mapping.items():
+                if host and not IPV4_RE.match(host):
+                    self._cache[host] = (ip, now + (self.ttl if ip else self.negative_ttl))
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+
+_default = DNSCache()
+
+
+def get_resolver():
+    return _default
+
+
+def set_resolver(cache):
+    """Ganti resolver global (mis. DNSCache dengan resolver stand-in untuk test)."""
+    global _default
+    _default = cache
+
+
+def resolve(host):
+    return _default.resolve(host)
+
+
+def resolve_many(hosts):
+    return _default.resolve_many(hosts)
+
+
+def prime(mapping):
+    _default.prime(mapping)
@@ -0,0 +1,77 @@
+"""
+Ekstraksi endpoint (ip, port) yang dites dari node/outbound.
+
+Urutan prioritas (dipakai app, reporter, converter dan tester):
+1. real_server / real_port
+2. transport.path berbentuk /ip-port
+3. path berbentuk /ip-port (trojan & shadowsocks menyimpan path di top level)
+4. server / server_port, hanya kalau fallback_server=True
+"""
+import re
+from functools import lru_cache
+
+PATH_IP_PORT = re.compile(r'/(\d{1,3}(?:\.\d{1,3}){3})-(\d+)')
+PATH_HOST_PORT = re.compile(r'/([A-Za-z0-9\.\-]+)-(\d+)')
+URL_PATTERNS = [
+    re.compile(r'(?:%2F|/)(\d+\.\d+\.\d+\.\d+)-(\d+)'),  # /IP-PORT atau %2FIP-PORT
+    re.compile(r'@([\w\.-]+):(\d+)[/?]'),  # @domain:port
+    re.compile(r'host=([\w\.-]+).*?port=(\d+)'),  # host=... port=...
+    re.compile(r'server":"([^"]+).*?"server_port":(\d+)'),  # JSON format
+]
+
+
+def parse_path(path):
+    """'/1.2.3.4-443...' -> ('1.2.3.4', 443), selain itu (None, None)."""
+    if not path:
+        return None, None
+    m = PATH_IP_PORT.match(path)
+    if m:
+        return m.group(1), int(m.group(2))
+    return None, None
+
+
+def endpoint_fingerprint(cfg, fallback_server=False):
+    """Field outbound yang menentukan endpoint; dipakai sebagai key memo."""
+    transport = cfg.get("transport") or {}
+    return (
+        cfg.get("real_server"), cfg.get("real_port"),
+        transport.get("path") if isinstance(transport, dict) else None,
+        cfg.get("path"),
+        cfg.get("server") if fallback_server else None,
+        cfg.get("server_port") if fallback_server else None,
+    )
+
+
+@lru_cache(maxsize=65536)
+def _resolve_fingerprint(fp):
+    real_server, real_port, transport_path, path, server, server_port = fp
+    if real_server and real_port:
+        return real_server, int(real_port)
+    for p in (transport_path, path):
+        ip, port = parse_path(p if isinstance(p, str) else None)
+        if ip:
+            return ip, port
+    if server and server_port:
+        return server, int(server_port)
+    return None, None
+
+
+def extract_ip_port(cfg, fallback_server=False):
+    """Return (ip, port) endpoint node sesuai urutan prioritas di atas, atau (None, None)."""
+    try:
+        return _resolve_fingerprint(endpoint_fingerprint(cfg, fallback_server))
+    except (TypeError, ValueError):
+        return None, None
+
+
+def iter_url_candidates(url):
+    """Yield (host, port) dari tiap pola URL_PATTERNS yang cocok, urut prioritas. Host belum di-resolve."""
+    for pattern in URL_PATTERNS:
+        m = pattern.search(url)
+        if m:
+            yield m.group(1), int(m.group(2))
+
+
+def extract_from_url(url):
+    """Kandidat (host, port) pertama di string link/JSON mentah. Host belum di-resolve."""
+    return next(iter_url_candidates(url), (None, None))
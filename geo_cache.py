@@ -0,0 +1,122 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_CACHE_DB = os.environ.get("GEO_CACHE_DB", "geo_cache.db")
+
+
+def prefix24(ip):
+    """'1.2.3.4' -> '1.2.3.0/24', None kalau bukan IPv4."""
+    parts = str(ip).split(".")
+    if len(parts) != 4 or not all(p.isdigit() for p in parts):
+        return None
+    return f"{parts[0]}.{parts[1]}.{parts[2]}.0/24"
+
+
+class GeoCache:
+    """
+    Cache hasil geo/ISP: LRU di memori dengan TTL, dan disimpan juga ke
+    sqlite supaya tetap ada setelah reporter/dashboard restart.
+    Kalau IP persisnya belum pernah dilihat, lookup jatuh ke /24 yang
+    menaunginya (node sering ganti IP di blok provider yang sama).
+    IP yang lookup-nya gagal disimpan sebagai "Unknown" selama negative_ttl
+    (hanya IP itu, bukan /24-nya) supaya tidak ditanyakan ulang tiap siklus.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_DB, ttl=7 * 24 * 3600, max_entries=20000, negative_ttl=600):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self._mem = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            try:
+                self._db = sqlite3.connect(path, check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS geo ("
+                    "key TEXT PRIMARY KEY, provider TEXT, country TEXT, expires REAL)"
+                )
+                self._db.execute("DELETE FROM geo WHERE expires < ?", (time.time(),))
+                self._db.commit()
+            except sqlite3.Error as e:
+                print(f"Gagal membuka cache geo {path}: {e}")
+                self._db = None
+
+    def _mem_get(self, key, now):
+        entry = self._mem.get(key)
+        if not entry:
+            return None
+        value, expires = entry
+        if expires < now:
+            del self._mem[key]
+            return None
+        self._mem.move_to_end(key)
+        return value
+
+    def _mem_put(self, key, value, expires):
+        self._mem[key] = (value, expires)
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_entries:
+            self._mem.popitem(last=False)
+
+    def _lookup(self, key, now):
+        value = self._mem_get(key, now)
+        if value is not None or self._db is None:
+            return value
+        row = self._db.execute(
+            "SELECT provider, country, expires FROM geo WHERE key = ?", (key,)
+        ).fetchone()
+        if not row or row[2] < now:
+            return None
+        value = {"provider": row[0], "country": row[1]}
+        self._mem_put(key, value, row[2])
+        return value
+
+    def get(self, ip):
+        now = time.time()
+        with self._lock:
+            value = self._lookup(ip, now)
+            if value is None:
+                prefix = prefix24(ip)
+                if prefix:
+                    value = self._lookup(prefix, now)
+            return dict(value) if value else None
+
+    def __contains__(self, ip):
+        return self.get(ip) is not None
+
+    def __getitem__(self, ip):
+        value = self.get(ip)
+        if value is None:
+            raise KeyError(ip)
+        return value
+
+    def set(self, ip, value, prefix=None):
+        """Simpan hasil untuk IP dan prefix-nya (default /24)."""
+        self._store([ip, prefix or prefix24(ip)], value, time.time() + self.ttl)
+
+    def set_unknown(self, ip):
+        """Catat lookup yang gagal: "Unknown" untuk IP ini saja, selama negative_ttl."""
+        self._store([ip], {"provider": "Unknown", "country": "Unknown"}, time.time() + self.negative_ttl)
+
+    def _store(self, keys, value, expires):
+        ip = keys[0]
+        value = {"provider": value.get("provider", "Unknown"), "country": value.get("country", "Unknown")}
+        with self._lock:
+            for key in keys:
+                if key:
+                    self._mem_put(key, value, expires)
+            if self._db is not None:
+                try:
+                    self._db.executemany(
+                        "INSERT OR REPLACE INTO geo VALUES (?, ?, ?, ?)",
+                        [(k, value["provider"], value["country"], expires) for k in keys if k]
+                    )
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    print(f"Gagal menyimpan cache geo {ip}: {e}")
+
+    __setitem__ = set
@@ -0,0 +1,149 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future
+
+import requests
+
+IP_API_URL = "http://ip-api.com"
+BATCH_FIELDS = "query,status,countryCode,isp"
+
+
+class TokenBucket:
+    def __init__(self, rate_per_minute, capacity=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Kosongkan bucket sampai `seconds` ke depan (dipakai saat server bilang limit habis)."""
+        with self._lock:
+            self.tokens = -seconds * self.rate
+            self.updated = time.monotonic()
+
+
+class GeoClient:
+    """
+    Client ip-api.com yang menggabungkan IP yang menunggu ke POST /batch
+    (maks 100 IP per request), dibatasi token bucket, memakai satu
+    requests.Session, dan satu request in-flight untuk IP yang sama.
+    """
+
+    def __init__(self, base_url=IP_API_URL, batch_size=100, batch_wait=0.05,
+                 rate_per_minute=15, timeout=10, session=None):
+        self.url = f"{base_url.rstrip('/')}/batch?fields={BATCH_FIELDS}"
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.timeout = timeout
+        self.bucket = TokenBucket(rate_per_minute)
+        self.session = session or requests.Session()
+        self._pending = []
+        self._futures = {}
+        self._cond = threading.Condition()
+        self._worker = None
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name="geo-client", daemon=True)
+            self._worker.start()
+
+    def submit(self, ip):
+        """Return Future berisi {'provider', 'country'} atau None kalau gagal."""
+        with self._cond:
+            fut = self._futures.get(ip)
+            if fut is not None:
+                return fut
+            fut = Future()
+            self._futures[ip] = fut
+            self._pending.append(ip)
+            self._ensure_worker()
+            self._cond.notify()
+            return fut
+
+    def lookup(self, ip, timeout=None):
+        try:
+            return self.submit(ip).result(timeout)
+        except Exception:
+            return None
+
+    def lookup_many(self, ips, timeout=None):
+        futures = {ip: self.submit(ip) for ip in dict.fromkeys(ips)}
+        results = {}
+        for ip, fut in futures.items():
+            try:
+                results[ip] = fut.result(timeout)
+            except Exception:
+                results[ip] = None
+        return results
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._pending:
+                self._cond.wait()
+            # Tunggu sebentar supaya IP lain sempat ikut dalam batch yang sama
+            deadline = time.monotonic() + self.batch_wait
+            while len(self._pending) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch = self._pending[:self.batch_size]
+            del self._pending[:self.batch_size]
+            return batch
+
+    def _resolve(self, ip, value):
+        with self._cond:
+            fut = self._futures.pop(ip, None)
+        if fut is not None and not fut.done():
+            fut.set_result(value)
+
+    def _post(self, batch):
+        for attempt in range(3):
+            self.bucket.acquire()
+            try:
+                r = self.session.post(self.url, json=batch, timeout=self.timeout)
+            except requests.RequestException as e:
+                logging.warning(f"[geo_client] Batch {len(batch)} IP gagal: {e}")
+                continue
+            ttl = int(r.headers.get("X-Ttl", "60") or 60)
+            if r.status_code == 429:
+                logging.warning(f"[geo_client] Kena rate limit, tunggu {ttl} detik")
+                self.bucket.pause(ttl)
+                continue
+            if r.headers.get("X-Rl") == "0":
+                self.bucket.pause(ttl)
+            if r.status_code != 200:
+                logging.warning(f"[geo_client] Batch gagal: {r.status_code}")
+                return []
+            return r.json()
+        return []
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            results = {}
+            try:
+                for item in self._post(batch):
+                    if item.get("status") == "success":
+                        results[item.get("query")] = {
+                            "provider": (item.get("isp") or "Unknown")[:30],
+                            "country": item.get("countryCode") or "Unknown"
+                        }
+            except Exception as e:
+                logging.error(f"[geo_client] Error parsing batch: {e}")
+            for ip in batch:
+                self._resolve(ip, results.get(ip))
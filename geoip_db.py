@@ -0,0 +1,149 @@
+import bisect
+import csv
+import ipaddress
+import mmap
+import os
+import socket
+import struct
+import sys
+from array import array
+
+MAGIC = b"VGEO1\x00\x00\x00"
+HEADER = struct.Struct("<8sII")  # magic, jumlah range, panjang blob string
+DEFAULT_DB = os.environ.get("GEOIP_DB", "geoip.bin")
+
+
+def _ip_to_int(ip):
+    return struct.unpack("!I", socket.inet_aton(ip))[0]
+
+
+def _read_ranges(src):
+    """
+    Baca sumber range IPv4. Format yang didukung:
+    - ip2asn-v4.tsv (iptoasn.com): start, end, asn, country, deskripsi
+    - CSV: cidr,country,isp
+    """
+    with open(src, encoding="utf-8", errors="ignore") as f:
+        if src.endswith(".tsv"):
+            for row in csv.reader(f, delimiter="\t"):
+                if len(row) < 5 or row[2] == "0":
+                    continue
+                yield _ip_to_int(row[0]), _ip_to_int(row[1]), row[3], row[4]
+        else:
+            for row in csv.reader(f):
+                if len(row) < 3 or row[0].startswith("#"):
+                    continue
+                net = ipaddress.IPv4Network(row[0].strip(), strict=False)
+                yield int(net.network_address), int(net.broadcast_address), row[1].strip(), row[2].strip()
+
+
+def build_database(src, dst=DEFAULT_DB):
+    """Compile sumber range ke tabel biner terurut yang bisa di-mmap."""
+    ranges = sorted(_read_ranges(src))
+    starts, ends, infos = array("I"), array("I"), array("I")
+    blob = bytearray()
+    offsets = {}
+    for start, end, country, isp in ranges:
+        if starts and start <= ends[-1]:
+            continue  # range tumpang tindih, pakai yang pertama
+        text = f"{country or 'Unknown'}\t{isp or 'Unknown'}".encode("utf-8")
+        if text not in offsets:
+            offsets[text] = len(blob)
+            blob += struct.pack("<H", len(text)) + text
+        starts.append(start)
+        ends.append(end)
+        infos.append(offsets[text])
+    if sys.byteorder != "little":
+        for arr in (starts, ends, infos):
+            arr.byteswap()
+    with open(dst, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(starts), len(blob)))
+        for arr in (starts, ends, infos):
+            arr.tofile(f)
+        f.write(blob)
+    return len(starts)
+
+
+class RangeDatabase:
+    """Tabel range IPv4 (hasil build_database) yang di-mmap; lookup pakai bisect."""
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count, _ = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} bukan database GeoIP yang valid")
+        if sys.byteorder != "little":
+            raise ValueError("database GeoIP hanya didukung di mesin little-endian")
+        view = memoryview(self._mm)
+        base = HEADER.size
+        size = count * 4
+        self._starts = view[base:base + size].cast("I")
+        self._ends = view[base + size:base + 2 * size].cast("I")
+        self._infos = view[base + 2 * size:base + 3 * size].cast("I")
+        self._blob_offset = base + 3 * size
+
+    def __len__(self):
+        return len(self._starts)
+
+    def lookup(self, ip):
+        try:
+            value = _ip_to_int(ip)
+        except (OSError, TypeError):
+            return None
+        i = bisect.bisect_right(self._starts, value) - 1
+        if i < 0 or value > self._ends[i]:
+            return None
+        pos = self._blob_offset + self._infos[i]
+        (length,) = struct.unpack_from("<H", self._mm, pos)
+        country, isp = bytes(self._mm[pos + 2:pos + 2 + length]).decode("utf-8").split("\t", 1)
+        return {"provider": isp[:30], "country": country}
+
+
+class MMDBDatabase:
+    """Reader MaxMind .mmdb (GeoLite2-ASN / Country / City), butuh paket maxminddb."""
+
+    def __init__(self, path):
+        import maxminddb
+        self._reader = maxminddb.open_database(path)
+
+    def lookup(self, ip):
+        try:
+            rec = self._reader.get(ip)
+        except ValueError:
+            return None
+        if not rec:
+            return None
+        country = (rec.get("country") or rec.get("registered_country") or {}).get("iso_code")
+        isp = rec.get("isp") or rec.get("autonomous_system_organization")
+        if not country and not isp:
+            return None
+        return {"provider": (isp or "Unknown")[:30], "country": country or "Unknown"}
+
+
+def open_database(path=DEFAULT_DB):
+    """Return database GeoIP lokal, atau None kalau file tidak ada / tidak bisa dibuka."""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        if path.endswith(".mmdb"):
+            return MMDBDatabase(path)
+        return RangeDatabase(path)
+    except Exception as e:
+        print(f"Gagal membuka database GeoIP {path}: {e}")
+        return None
+
+
+def http_fallback_enabled():
+    """GEOIP_HTTP_FALLBACK=0 mematikan lookup HTTP kalau IP tidak ada di database lokal."""
+    return os.environ.get("GEOIP_HTTP_FALLBACK", "1") == "1"
+
+
+if __name__ == "__main__":
+    # python geoip_db.py ip2asn-v4.tsv [geoip.bin]
+    if len(sys.argv) < 2:
+        print("Usage: python geoip_db.py <ip2asn-v4.tsv|ranges.csv> [output.bin]")
+        sys.exit(1)
+    out = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_DB
+    n = build_database(sys.argv[1], out)
+    print(f"{n} range ditulis ke {out}")
@@ -0,0 +1,326 @@
+import base64
+import hashlib
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+GITHUB_API = "https://api.github.com"
+RETRY_STATUS = (500, 502, 503, 504)
+DEFAULT_BLOB_CACHE = os.environ.get("GITHUB_BLOB_CACHE", "blob_cache")
+
+
+def git_blob_sha(data):
+    """SHA-1 blob git untuk bytes `data` (sama dengan sha di tree/contents API)."""
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+class GitHubError(Exception):
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class GitHubClient:
+    """
+    Client GitHub contents API dengan satu requests.Session (keep-alive),
+    timeout per request, dan cache ETag: listing dan file dikirim dengan
+    If-None-Match, jadi 304 tidak memakan kuota rate limit. Isi file
+    di-cache per blob sha. Retry dengan backoff eksponensial, dan kalau
+    limit habis (X-RateLimit-Remaining: 0) menunggu sampai X-RateLimit-Reset.
+    Blob juga disimpan di `blob_cache_dir` supaya restart tidak download ulang.
+    """
+
+    def __init__(self, repo, token="", base_url=GITHUB_API, timeout=(5, 30), max_retries=3,
+                 backoff=1.0, max_wait=60, session=None, blob_cache_dir=DEFAULT_BLOB_CACHE,
+                 max_workers=8):
+        self.repo = repo
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_wait = max_wait
+        self.blob_cache_dir = blob_cache_dir
+        self.max_workers = max_workers
+        self.session = session or requests.Session()
+        self.session.headers.update({"Accept": "application/vnd.github.v3+json"})
+        if token:
+            self.session.headers["Authorization"] = f"token {token}"
+        self._lock = threading.Lock()
+        self._etags = {}    # url -> (etag, json)
+        self._blobs = {}    # sha -> teks file
+        self._shas = {}     # path -> sha terakhir yang diketahui
+        self.stats = {"requests": 0, "not_modified": 0, "retries": 0}
+        self.rate_remaining = None
+        self._default_branch = None
+
+    def _url(self, path):
+        return f"{self.base_url}/repos/{self.repo}/contents/{path.lstrip('/')}"
+
+    def _git_url(self, path):
+        return f"{self.base_url}/repos/{self.repo}/git/{path}"
+
+    def _retry_wait(self, r, attempt):
+        """Detik yang ditunggu sebelum retry, atau None kalau response tidak perlu diulang."""
+        if r is None or r.status_code in RETRY_STATUS:
+            return self.backoff * 2 ** attempt
+        if r.status_code in (403, 429):
+            if r.headers.get("Retry-After"):
+                return float(r.headers["Retry-After"])
+            if r.headers.get("X-RateLimit-Remaining") == "0":
+                reset = float(r.headers.get("X-RateLimit-Reset", 0))
+                return max(0, reset - time.time()) + 1
+        return None
+
+    def request(self, method, url, etag=None, **kwargs):
+        headers = kwargs.pop("headers", {})
+        if etag:
+            headers["If-None-Match"] = etag
+        for attempt in range(self.max_retries + 1):
+            r = None
+            try:
+                self.stats["requests"] += 1
+                r = self.session.request(method, url, headers=headers, timeout=self.timeout, **kwargs)
+                if r.headers.get("X-RateLimit-Remaining") is not None:
+                    self.rate_remaining = int(r.headers["X-RateLimit-Remaining"])
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == self.max_retries:
+                    raise GitHubError(f"{method} {url} gagal: {e}")
+            wait = self._retry_wait(r, attempt)
+            if wait is None or attempt == self.max_retries:
+                return r
+            if wait > self.max_wait:
+                logging.warning(f"[github] Rate limit habis, reset {wait:.0f}s lagi (> {self.max_wait}s), tidak menunggu")
+                return r
+            status = r.status_code if r is not None else "error"
+            logging.info(f"[github] {method} {url} -> {status}, retry dalam {wait:.1f}s")
+            self.stats["retries"] += 1
+            time.sleep(wait)
+        return r
+
+    def _get_json(self, url):
+        """GET bersyarat: pakai ETag tersimpan, 304 mengembalikan data dari cache."""
+        with self._lock:
+            cached = self._etags.get(url)
+        r = self.request("GET", url, etag=cached[0] if cached else None)
+        if r.status_code == 304 and cached:
+            self.stats["not_modified"] += 1
+            return cached[1]
+        if r.status_code != 200:
+            raise GitHubError(f"GET {url} -> {r.status_code}: {r.text[:200]}", r.status_code)
+        data = r.json()
+        if r.headers.get("ETag"):
+            with self._lock:
+                self._etags[url] = (r.headers["ETag"], data)
+        return data
+
+    def list_files(self, path=""):
+        """Isi direktori: list dict {name, path, sha, type, ...} dari contents API."""
+        entries = self._get_json(self._url(path))
+        with self._lock:
+            for e in entries:
+                self._shas[e["path"]] = e["sha"]
+        return entries
+
+    def get_file(self, path):
+        """
+        Return (teks, sha) file. sha dicari lewat tree (remote_sha), isinya lewat
+        get_blob raw: kena cache blob dan tidak kena batas 1 MB contents API.
+        """
+        sha = self.remote_sha(path)
+        if sha is None:
+            raise GitHubError(f"GET {path} -> 404: file tidak ada", 404)
+        return self.get_blob(sha), sha
+
+    def known_sha(self, path):
+        with self._lock:
+            return self._shas.get(path)
+
+    def remote_sha(self, path):
+        """sha file di remote (None kalau belum ada). File di root cukup lewat tree bersyarat."""
+        if "/" not in path.strip("/"):
+            self.get_tree()
+            return self.known_sha(path)
+        try:
+            # Metadata contents API tetap berisi sha walau file > 1 MB
+            data = self._get_json(self._url(path))
+        except GitHubError as e:
+            if e.status != 404:
+                raise
+            return None
+        with self._lock:
+            self._shas[path] = data["sha"]
+        return data["sha"]
+
+    def put_file(self, path, text, message, sha=None):
+        """
+        Buat/update file. Kalau git blob sha konten lokal sama dengan sha remote,
+        PUT dilewati dan return {"skipped": True, ...}.
+        """
+        local_sha = git_blob_sha(text.encode("utf-8"))
+        if sha is None:
+            sha = self.remote_sha(path)
+        if sha == local_sha:
+            logging.info(f"[github] {path} tidak berubah, upload dilewati")
+            return {"skipped": True, "content": {"path": path, "sha": sha}}
+        data = {"message": message, "content": base64.b64encode(text.encode("utf-8")).decode()}
+        if sha:
+            data["sha"] = sha
+        url = self._url(path)
+        r = self.request("PUT", url, json=data)
+        if r.status_code not in (200, 201):
+            raise GitHubError(f"PUT {path} -> {r.status_code}: {r.text[:200]}", r.status_code)
+        result = r.json()
+        new_sha = result.get("content", {}).get("sha")
+        with self._lock:
+            if new_sha:
+                self._shas[path] = new_sha
+                self._blobs[new_sha] = text
+            # Listing/isi file lama sudah basi
+            self._etags.pop(url, None)
+            self._etags.pop(self._url(path.rpartition("/")[0]), None)
+        return result
+
+    def _read_cached_blob(self, sha):
+        with self._lock:
+            text = self._blobs.get(sha)
+        if text is not None or not self.blob_cache_dir:
+            return text
+        try:
+            with open(os.path.join(self.blob_cache_dir, sha), "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        if git_blob_sha(data) != sha:
+            return None
+        try:
+            text = data.decode("utf-8")
+        except UnicodeDecodeError:
+            return None
+        with self._lock:
+            self._blobs[sha] = text
+        return text
+
+    def _write_cached_blob(self, sha, data):
+        if not self.blob_cache_dir:
+            return
+        try:
+            os.makedirs(self.blob_cache_dir, exist_ok=True)
+            tmp = os.path.join(self.blob_cache_dir, f"{sha}.tmp")
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, os.path.join(self.blob_cache_dir, sha))
+        except OSError as e:
+            logging.warning(f"[github] Gagal menyimpan cache blob {sha}: {e}")
+
+    def get_tree(self, ref="HEAD"):
+        """Entry tree (root) dari ref, lewat GET bersyarat."""
+        tree = self._get_json(self._git_url(f"trees/{ref}"))
+        if tree.get("truncated"):
+            logging.warning("[github] Tree terpotong, sebagian file tidak terbaca")
+        if ref == "HEAD":
+            with self._lock:
+                for e in tree["tree"]:
+                    if e.get("type") == "blob":
+                        self._shas[e["path"]] = e["sha"]
+        return tree["tree"]
+
+    def get_blob(self, sha):
+        """Isi blob (teks). Dari cache kalau ada; kalau tidak, download raw (tanpa batas 1 MB contents API)."""
+        text = self._read_cached_blob(sha)
+        if text is not None:
+            return text
+        r = self.request("GET", self._git_url(f"blobs/{sha}"),
+                         headers={"Accept": "application/vnd.github.raw"})
+        if r.status_code != 200:
+            raise GitHubError(f"GET blob {sha} -> {r.status_code}: {r.text[:200]}", r.status_code)
+        data = r.content
+        if git_blob_sha(data) != sha:
+            raise GitHubError(f"Blob {sha} rusak (sha tidak cocok)")
+        self._write_cached_blob(sha, data)
+        text = data.decode("utf-8")
+        with self._lock:
+            self._blobs[sha] = text
+        return text
+
+    def load_files(self, suffixes=(".txt", ".json"), ref="HEAD"):
+        """
+        Baca tree sekali lalu download blob yang berubah secara paralel.
+        Return {path: teks}. Kalau tidak ada yang berubah cukup satu request (304).
+        """
+        entries = [e for e in self.get_tree(ref)
+                   if e.get("type") == "blob" and e["path"].endswith(tuple(suffixes))]
+        files = {}
+        missing = []
+        for e in entries:
+            text = self._read_cached_blob(e["sha"])
+            if text is None:
+                missing.append(e)
+            else:
+                files[e["path"]] = text
+        if missing:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                futures = [(e, pool.submit(self.get_blob, e["sha"])) for e in missing]
+                for e, fut in futures:
+                    try:
+                        files[e["path"]] = fut.result()
+                    except (GitHubError, UnicodeDecodeError) as ex:
+                        logging.warning(f"[github] Gagal download {e['path']}: {ex}")
+            logging.info(f"[github] {len(missing)} blob di-download, {len(entries) - len(missing)} dari cache")
+        return {e["path"]: files[e["path"]] for e in entries if e["path"] in files}
+
+    def _post_json(self, method, url, data, expected=(200, 201)):
+        r = self.request(method, url, json=data)
+        if r.status_code not in expected:
+            raise GitHubError(f"{method} {url} -> {r.status_code}: {r.text[:200]}", r.status_code)
+        return r.json()
+
+    def default_branch(self):
+        if self._default_branch is None:
+            self._default_branch = self._get_json(f"{self.base_url}/repos/{self.repo}")["default_branch"]
+        return self._default_branch
+
+    def commit_files(self, files, message, branch=None, retries=2):
+        """
+        Tulis banyak file {path: teks} sebagai satu commit lewat Git Data API
+        (tree dengan konten inline -> commit -> update ref). File yang blob sha-nya
+        sama dengan di commit terakhir dilewati; kalau semua sama tidak ada commit.
+        Return sha commit baru atau None.
+        """
+        branch = branch or self.default_branch()
+        for attempt in range(retries + 1):
+            ref = self._get_json(self._git_url(f"ref/heads/{branch}"))
+            parent = ref["object"]["sha"]
+            base_tree = self._get_json(self._git_url(f"commits/{parent}"))["tree"]["sha"]
+            remote = {e["path"]: e["sha"] for e in self.get_tree(base_tree) if e.get("type") == "blob"}
+            changed = {path: text for path, text in files.items()
+                       if remote.get(path) != git_blob_sha(text.encode("utf-8"))}
+            if not changed:
+                logging.info(f"[github] {len(files)} file tidak berubah, commit dilewati")
+                return None
+            tree = self._post_json("POST", self._git_url("trees"), {
+                "base_tree": base_tree,
+                "tree": [{"path": path, "mode": "100644", "type": "blob", "content": text}
+                         for path, text in changed.items()],
+            })
+            commit = self._post_json("POST", self._git_url("commits"), {
+                "message": message, "tree": tree["sha"], "parents": [parent],
+            })
+            try:
+                self._post_json("PATCH", self._git_url(f"refs/heads/{branch}"), {"sha": commit["sha"]})
+            except GitHubError as e:
+                # 422: branch maju di tengah jalan (bukan fast-forward), ulang dari ref terbaru
+                if e.status != 422 or attempt == retries:
+                    raise
+                logging.info(f"[github] Ref {branch} berubah, commit diulang")
+                continue
+            with self._lock:
+                for path, text in changed.items():
+                    sha = git_blob_sha(text.encode("utf-8"))
+                    self._shas[path] = sha
+                    self._blobs[sha] = text
+            logging.info(f"[github] Commit {commit['sha'][:7]}: {len(changed)} dari {len(files)} file berubah")
+            return commit["sha"]
@@ -0,0 +1,166 @@
+import os
+import select
+import socket
+import struct
+import threading
+import time
+
+ICMP_ECHO_REQUEST = 8
+ICMP_ECHO_REPLY = 0
+
+
+def checksum(data):
+    if len(data) % 2:
+        data += b'\x00'
+    total = sum(struct.unpack(f'!{len(data) // 2}H', data))
+    total = (total >> 16) + (total & 0xffff)
+    total += total >> 16
+    return ~total & 0xffff
+
+
+def build_echo(ident, seq, payload=b'vpn-tester'):
+    header = struct.pack('!BBHHH', ICMP_ECHO_REQUEST, 0, 0, ident, seq)
+    csum = checksum(header + payload)
+    return struct.pack('!BBHHH', ICMP_ECHO_REQUEST, 0, csum, ident, seq) + payload
+
+
+class Pinger:
+    """
+    Pinger ICMP tanpa subprocess. Pakai socket datagram ICMP (unprivileged,
+    lihat net.ipv4.ping_group_range), fallback ke raw socket kalau diizinkan.
+    Satu socket dipakai untuk ping banyak host sekaligus; balasan dicocokkan
+    lewat identifier, alamat pengirim dan sequence.
+    """
+
+    def __init__(self, count=3, timeout=2, interval=0.2):
+        self.count = count
+        self.timeout = timeout
+        self.interval = interval
+        self._seq = 0
+        self._lock = threading.Lock()
+        self.mode = self._detect_mode()
+
+    @property
+    def available(self):
+        return self.mode is not None
+
+    def _detect_mode(self):
+        for mode in ('dgram', 'raw'):
+            try:
+                self._open(mode).close()
+                return mode
+            except OSError:
+                continue
+        return None
+
+    def _open(self, mode):
+        kind = socket.SOCK_DGRAM if mode == 'dgram' else socket.SOCK_RAW
+        return socket.socket(socket.AF_INET, kind, socket.IPPROTO_ICMP)
+
+    def _next_seq(self):
+        with self._lock:
+            self._seq = (self._seq + 1) & 0xffff
+            return self._seq
+
+    def _parse_reply(self, packet):
+        if self.mode == 'raw':
+            ihl = (packet[0] & 0x0f) * 4
+            packet = packet[ihl:]
+        if len(packet) < 8:
+            return None
+        icmp_type, _, _, ident, seq = struct.unpack('!BBHHH', packet[:8])
+        if icmp_type != ICMP_ECHO_REPLY:
+            return None
+        return ident, seq
+
+    def ping_many(self, hosts, count=None, timeout=None):
+        """
+        Return {host: {'rtts': [ms, ...], 'sent': n, 'loss': 0.0-1.0}}.
+        Host yang gagal di-resolve dianggap loss 100%.
+        """
+        count = count or self.count
+        timeout = timeout or self.timeout
+        # Host kosong/bukan string dilewati supaya satu entri jelek tidak menggagalkan satu batch
+        hosts = list(dict.fromkeys(h for h in hosts if isinstance(h, str) and h))
+        stats = {h: {'rtts': [], 'sent': 0, 'loss': 1.0} for h in hosts}
+        if not self.available or not hosts:
+            return stats
+
+        addrs = {}
+        for h in hosts:
+            try:
+                addrs[h] = socket.gethostbyname(h)
+            except (OSError, TypeError, UnicodeError):
+                pass
+
+        sock = self._open(self.mode)
+        try:
+            sock.setblocking(False)
+            if self.mode == 'dgram':
+                # Kernel mengganti identifier dengan port lokal socket
+                sock.bind(('', 0))
+                ident = sock.getsockname()[1]
+            else:
+                ident = (os.getpid() ^ id(self)) & 0xffff
+
+            schedule = []
+            start = time.perf_counter()
+            for rnd in range(count):
+                for h in addrs:
+                    schedule.append((start + rnd * self.interval, h))
+            # Key (ip, seq): sequence 16 bit bisa wrap di batch besar (> 65535 ping),
+            # tapi tidak untuk IP yang sama dalam satu panggilan
+            outstanding = {}
+            pos = 0
+            deadline = start + (count - 1) * self.interval + timeout
+
+            while True:
+                now = time.perf_counter()
+                while pos < len(schedule) and schedule[pos][0] <= now:
+                    host = schedule[pos][1]
+                    pos += 1
+                    seq = self._next_seq()
+                    try:
+                        sock.sendto(build_echo(ident, seq), (addrs[host], 0))
+                        outstanding[(addrs[host], seq)] = (host, time.perf_counter())
+                        stats[host]['sent'] += 1
+                    except OSError:
+                        stats[host]['sent'] += 1
+                if pos >= len(schedule) and not outstanding:
+                    break
+                now = time.perf_counter()
+                if now >= deadline:
+                    break
+                wait = deadline - now
+                if pos < len(schedule):
+                    wait = min(wait, max(0.0, schedule[pos][0] - now))
+                readable, _, _ = select.select([sock], [], [], wait)
+                if not readable:
+                    continue
+                while True:
+                    try:
+                        packet, addr = sock.recvfrom(2048)
+                    except (BlockingIOError, InterruptedError):
+                        break
+                    received = time.perf_counter()
+                    parsed = self._parse_reply(packet)
+                    if not parsed:
+                        continue
+                    r_ident, seq = parsed
+                    if self.mode == 'raw' and r_ident != ident:
+                        continue
+                    entry = outstanding.pop((addr[0], seq), None)
+                    if not entry:
+                        continue
+                    host, sent_at = entry
+                    stats[host]['rtts'].append((received - sent_at) * 1000)
+        finally:
+            sock.close()
+
+        for st in stats.values():
+            if st['sent']:
+                st['loss'] = 1 - len(st['rtts']) / st['sent']
+        return stats
+
+    def ping(self, host, count=None, timeout=None):
+        return self.ping_many([host], count, timeout)[host]
@@ -0,0 +1,49 @@
+import statistics
+
+LATENCY_FIELDS = ('latency_min', 'latency_median', 'latency_p90', 'jitter', 'loss')
+
+
+def percentile(sorted_samples, pct):
+    """Percentile dengan interpolasi linear; sorted_samples harus sudah urut."""
+    if not sorted_samples:
+        return None
+    k = (len(sorted_samples) - 1) * pct / 100
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_samples) - 1)
+    return sorted_samples[lo] + (sorted_samples[hi] - sorted_samples[lo]) * (k - lo)
+
+
+def summarize(samples, sent):
+    """
+    Ringkas sampel latency (ms, urut sesuai waktu kirim) jadi field numerik.
+    Jitter = rata-rata selisih absolut sampel berurutan.
+    """
+    if not sent:
+        return {f: None for f in LATENCY_FIELDS}
+    loss = 1 - len(samples) / sent
+    if not samples:
+        return {'latency_min': None, 'latency_median': None, 'latency_p90': None,
+                'jitter': None, 'loss': loss}
+    ordered = sorted(samples)
+    diffs = [abs(b - a) for a, b in zip(samples, samples[1:])]
+    return {
+        'latency_min': round(ordered[0], 2),
+        'latency_median': round(statistics.median(ordered), 2),
+        'latency_p90': round(percentile(ordered, 90), 2),
+        'jitter': round(sum(diffs) / len(diffs), 2) if diffs else 0.0,
+        'loss': round(loss, 3)
+    }
+
+
+def latency_value(result, default=None):
+    """Ambil latency numerik dari hasil test (median), fallback parse string 'xx.xx ms'."""
+    value = result.get('latency_median')
+    if value is not None:
+        return value
+    text = str(result.get('latency', 'N/A'))
+    if text == 'N/A':
+        return default
+    try:
+        return float(text.split()[0].replace(",", "."))
+    except ValueError:
+        return default
@@ -0,0 +1,111 @@
+import hashlib
+import json
+import re
+
+PROXY_TYPES = ("trojan", "vless", "vmess", "shadowsocks")
+CREDENTIAL_FIELDS = ("uuid", "password", "method")
+TAG_COUNTRY_RE = re.compile(r"\((\w{2})\)|[\U0001F1E6-\U0001F1FF]{2}")
+GENERIC_TAGS = ("", "-", "vpn")
+
+
+def canonical_outbound(cfg):
+    """
+    Bentuk normal outbound untuk identitas node: type, server, port, kredensial,
+    transport (type + path) dan TLS. Tag/provider/country tidak ikut.
+    """
+    transport = cfg.get("transport") or {}
+    tls = cfg.get("tls") or {}
+    try:
+        port = int(cfg.get("server_port") or 0)
+    except (TypeError, ValueError):
+        port = 0
+    return (
+        str(cfg.get("type") or "").lower(),
+        str(cfg.get("server") or "").strip().lower(),
+        port,
+        *(cfg.get(f) for f in CREDENTIAL_FIELDS),
+        str(transport.get("type") or "").lower(),
+        # Path di top level (trojan/ss) hanya target IP test, bukan bagian koneksi;
+        # hasil test di-key terpisah dengan path (result_store.result_key)
+        (transport.get("path") or "").strip(),
+        bool(tls.get("enabled")),
+        str(tls.get("server_name") or "").strip().lower(),
+    )
+
+
+def outbound_fingerprint(cfg):
+    return hashlib.sha1(json.dumps(canonical_outbound(cfg), default=str).encode()).hexdigest()
+
+
+def tag_quality(tag, cfg=None):
+    """Skor tag untuk aturan "keep best tag": ada info negara, provider, dan bukan tag generik."""
+    cfg = cfg or {}
+    tag = (tag or "").strip()
+    score = 0
+    if TAG_COUNTRY_RE.search(tag) or cfg.get("country") not in (None, "", "-"):
+        score += 1
+    if cfg.get("provider") not in (None, "", "-"):
+        score += 1
+    if tag.lower() not in GENERIC_TAGS and tag != cfg.get("server"):
+        score += 1
+    return score
+
+
+class NodeIndex:
+    """
+    Index fingerprint -> node. Node duplikat (server/port/kredensial/transport sama,
+    tag beda) digabung: tag terbaik yang dipakai, provider/country yang kosong
+    diisi dari duplikatnya. Posisi mengikuti kemunculan pertama.
+    """
+
+    def __init__(self):
+        self.entries = {}
+        self.added = 0
+
+    def add(self, cfg, tag=None, source=None):
+        """Tambah node (disimpan sebagai copy, dict pemanggil tidak diubah), return fingerprint-nya."""
+        cfg = dict(cfg)
+        fp = outbound_fingerprint(cfg)
+        tag = cfg.get("tag", "") if tag is None else tag
+        self.added += 1
+        entry = self.entries.get(fp)
+        if entry is None:
+            self.entries[fp] = {"node": cfg, "tag": tag, "sources": [source] if source else [], "count": 1}
+            return fp
+        entry["count"] += 1
+        if source and source not in entry["sources"]:
+            entry["sources"].append(source)
+        best, other = entry["node"], cfg
+        if tag_quality(tag, cfg) > tag_quality(entry["tag"], entry["node"]):
+            best, other = cfg, entry["node"]
+            entry["node"], entry["tag"] = cfg, tag
+        for field in ("provider", "country"):
+            if best.get(field) in (None, "", "-") and other.get(field) not in (None, "", "-"):
+                best[field] = other[field]
+        return fp
+
+    def __contains__(self, fp):
+        return fp in self.entries
+
+    def get(self, fp):
+        return self.entries.get(fp)
+
+    @property
+    def duplicates(self):
+        return self.added - len(self.entries)
+
+    def nodes(self):
+        """(node, tag) yang dipertahankan, urut kemunculan pertama."""
+        return [(e["node"], e["tag"]) for e in self.entries.values()]
+
+    @classmethod
+    def from_configs(cls, configs):
+        """Index semua outbound proxy dari {nama_file: config} (mis. hasil load_github_configs)."""
+        index = cls()
+        for name, config in configs.items():
+            if not isinstance(config, dict):
+                continue
+            for o in config.get("outbounds", []):
+                if isinstance(o, dict) and o.get("type") in PROXY_TYPES:
+                    index.add(o, source=name)
+        return index
@@ -0,0 +1,154 @@
+import logging
+import queue
+import threading
+import time
+
+_DONE = object()
+
+
+class Stage:
+    """
+    Satu tahap pipeline: `fn(item)` dijalankan `workers` thread, input dari
+    antrian berukuran `maxsize`. fn return None = item dibuang (tidak lanjut).
+    Kalau batch_size diisi, fn menerima list item (sebanyak yang sudah ada di
+    antrian, maks batch_size) dan return list hasil dengan urutan yang sama;
+    cocok untuk fn yang sudah paralel di dalam (async probe, DNS per chunk).
+    """
+
+    def __init__(self, name, fn, workers=1, maxsize=1000, batch_size=None):
+        self.name = name
+        self.fn = fn
+        self.workers = workers
+        self.batch_size = batch_size
+        self.queue = queue.Queue(maxsize)
+        self.processed = 0
+        self.dropped = 0
+        self.errors = 0
+        self.busy = 0.0
+        self.max_depth = 0
+        self.started = None
+        self.finished = None
+        self._lock = threading.Lock()
+
+    def stats(self):
+        with self._lock:
+            elapsed = ((self.finished or time.monotonic()) - self.started) if self.started else 0
+            return {
+                "processed": self.processed,
+                "dropped": self.dropped,
+                "errors": self.errors,
+                "per_sec": round(self.processed / elapsed, 1) if elapsed else 0.0,
+                "avg_ms": round(self.busy / self.processed * 1000, 1) if self.processed else 0.0,
+                "queue": self.queue.qsize(),
+                "max_queue": self.max_depth,
+            }
+
+
+class Pipeline:
+    """
+    Rangkaian Stage dengan antrian terbatas di antara tiap tahap, jadi tahap
+    lambat (network) tidak menahan tahap lain dan memori tetap terbatas.
+    run() yield (index, item) sesuai urutan selesai; index = posisi di input.
+    """
+
+    def __init__(self, stages):
+        self.stages = stages
+
+    def _put(self, stage, entry):
+        stage.queue.put(entry)
+        depth = stage.queue.qsize()
+        if depth > stage.max_depth:
+            stage.max_depth = depth
+
+    def _take(self, stage):
+        """Entry berikutnya (list kalau stage batch). Return (entries, selesai)."""
+        entry = stage.queue.get()
+        if entry is _DONE:
+            return [], True
+        if not stage.batch_size:
+            return [entry], False
+        entries = [entry]
+        while len(entries) < stage.batch_size:
+            try:
+                entry = stage.queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is _DONE:
+                return entries, True
+            entries.append(entry)
+        return entries, False
+
+    def _worker(self, stage, out, remaining):
+        done = False
+        while not done:
+            entries, done = self._take(stage)
+            if not entries:
+                continue
+            start = time.monotonic()
+            try:
+                if stage.batch_size:
+                    results = stage.fn([item for _, item in entries])
+                else:
+                    results = [stage.fn(entries[0][1])]
+            except Exception as e:
+                logging.warning(f"[pipeline] {stage.name} gagal untuk item #{entries[0][0]}"
+                                f"{f' (+{len(entries) - 1})' if len(entries) > 1 else ''}: {e}")
+                results = [None] * len(entries)
+                with stage._lock:
+                    stage.errors += len(entries)
+            with stage._lock:
+                stage.processed += len(entries)
+                stage.busy += time.monotonic() - start
+                stage.dropped += sum(1 for r in results if r is None)
+            for (idx, _), result in zip(entries, results):
+                if result is None:
+                    continue
+                if isinstance(out, Stage):
+                    self._put(out, (idx, result))
+                else:
+                    out.put((idx, result))
+        with stage._lock:
+            remaining[stage.name] -= 1
+            last = remaining[stage.name] == 0
+            if last:
+                stage.finished = time.monotonic()
+        if last:
+            # Worker terakhir yang selesai menutup tahap berikutnya
+            if isinstance(out, Stage):
+                for _ in range(out.workers):
+                    out.queue.put(_DONE)
+            else:
+                out.put(_DONE)
+
+    def run(self, items):
+        results = queue.Queue()
+        remaining = {s.name: s.workers for s in self.stages}
+        for i, stage in enumerate(self.stages):
+            out = self.stages[i + 1] if i + 1 < len(self.stages) else results
+            stage.started = time.monotonic()
+            for _ in range(stage.workers):
+                threading.Thread(target=self._worker, args=(stage, out, remaining), daemon=True).start()
+
+        def feed():
+            first = self.stages[0]
+            try:
+                for entry in enumerate(items):
+                    self._put(first, entry)
+            finally:
+                for _ in range(first.workers):
+                    first.queue.put(_DONE)
+
+        threading.Thread(target=feed, daemon=True).start()
+        while True:
+            entry = results.get()
+            if entry is _DONE:
+                break
+            yield entry
+
+    def stats(self):
+        return {s.name: s.stats() for s in self.stages}
+
+    def log_stats(self, prefix="[pipeline]"):
+        for name, s in self.stats().items():
+            logging.info(f"{prefix} {name}: {s['processed']} diproses ({s['per_sec']}/s, rata2 {s['avg_ms']} ms), "
+                         f"{s['dropped']} dibuang, {s['errors']} error, antrian maks {s['max_queue']}")
@@ -0,0 +1,82 @@
+import logging
+from collections import OrderedDict
+
+from probe_engine import MODE_FULL
+from protocol_probe import probe_profile
+
+
+def target_key(target, mode=MODE_FULL):
+    ip, port = target
+    return ("tcp", ip, int(port), mode)
+
+
+def protocol_key(outbound):
+    p = probe_profile(outbound)
+    return ("proto", p["host"], p["port"], p["tls"], p["sni"], p["ws_path"], p["ws_host"])
+
+
+class ProbeCoordinator:
+    """
+    Satu siklus test (satu klik "Test & Convert" atau satu putaran reporter).
+    Target yang sama (ip, port, profil probe) hanya diprobe sekali per siklus,
+    hasilnya dibagikan ke semua node yang menunjuk ke endpoint itu.
+    """
+
+    def __init__(self, tester):
+        self.tester = tester
+        self.new_cycle()
+
+    def new_cycle(self):
+        self.results = {}
+        self.requested = 0
+        self.probed = 0
+
+    @property
+    def saved(self):
+        return self.requested - self.probed
+
+    def stats(self):
+        return {"requested": self.requested, "probed": self.probed, "saved": self.saved}
+
+    def _fan_out(self, items, key_fn, runner):
+        groups = OrderedDict()
+        for idx, item in enumerate(items):
+            groups.setdefault(key_fn(item), []).append(idx)
+        self.requested += len(items)
+
+        # Hasil yang sudah ada di siklus ini langsung dipakai ulang
+        todo = []
+        for key, idxs in groups.items():
+            if key in self.results:
+                for i in idxs:
+                    yield i, dict(self.results[key])
+            else:
+                todo.append(key)
+        if not todo:
+            return
+        self.probed += len(todo)
+        for uidx, result in runner([items[groups[key][0]] for key in todo]):
+            key = todo[uidx]
+            self.results[key] = result
+            for i in groups[key]:
+                yield i, dict(result)
+
+    def test_many(self, targets, mode=MODE_FULL, max_in_flight=None):
+        """Seperti VPNTester.test_many, tapi target duplikat hanya diprobe sekali."""
+        return self._fan_out(
+            list(targets),
+            lambda t: target_key(t, mode),
+            lambda unique: self.tester.test_many(unique, max_in_flight, mode)
+        )
+
+    def test_protocols(self, outbounds, max_in_flight=None):
+        """Seperti VPNTester.test_protocols, dedup berdasarkan profil TLS/WS."""
+        return self._fan_out(
+            list(outbounds),
+            protocol_key,
+            lambda unique: self.tester.test_protocols(unique, max_in_flight)
+        )
+
+    def log_stats(self, prefix="[probe_coordinator]"):
+        s = self.stats()
+        logging.info(f"{prefix} {s['requested']} probe diminta, {s['probed']} dijalankan, {s['saved']} dihemat")
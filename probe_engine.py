@@ -0,0 +1,354 @@
+import asyncio
+import errno
+import logging
+import queue
+import re
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+from icmp_pinger import Pinger
+from latency_stats import summarize, LATENCY_FIELDS
+
+DEFAULT_CONCURRENCY = 500
+
+# liveness: cukup tahu node hidup (TCP saja, berhenti di port pertama yang connect)
+# full: TCP + ICMP + geo
+MODE_LIVENESS = "liveness"
+MODE_FULL = "full"
+
+
+def socket_budget(requested=None):
+    """
+    Jumlah socket yang boleh terbuka bersamaan: setengah RLIMIT_NOFILE
+    (sisanya untuk file, log, pool thread). requested dibatasi ke nilai itu.
+    """
+    limit = None
+    if resource is not None:
+        soft = resource.getrlimit(resource.RLIMIT_NOFILE)[0]
+        if soft != resource.RLIM_INFINITY:
+            limit = max(1, soft // 2)
+    if requested is None:
+        return limit or DEFAULT_CONCURRENCY
+    return min(requested, limit) if limit else requested
+
+
+def empty_result(ip, port):
+    return {
+        'ip': ip,
+        'port': port,
+        'icmp': '❌',
+        'tcp_443': '❌',
+        'tcp_custom': '❌',
+        'latency': 'N/A',
+        'provider': 'Unknown',
+        'country': 'Unknown',
+        'status': '❌ DEAD',
+        **{f: None for f in LATENCY_FIELDS}
+    }
+
+
+def iter_async(make_agen, loop=None):
+    """
+    Jalankan async generator dari thread biasa dan yield item-nya.
+    make_agen dipanggil di dalam event loop; loop=None berarti pakai
+    event loop baru di thread terpisah.
+    """
+    q = queue.Queue()
+    done = object()
+
+    async def consume():
+        async for item in make_agen():
+            q.put(item)
+
+    def finished(fut):
+        if not fut.cancelled() and fut.exception():
+            logging.error(f"[probe_engine] Batch gagal: {fut.exception()}")
+        q.put(done)
+
+    if loop is not None:
+        future = asyncio.run_coroutine_threadsafe(consume(), loop)
+        future.add_done_callback(finished)
+    else:
+        future = None
+
+        def worker():
+            try:
+                asyncio.run(consume())
+            except Exception as e:
+                logging.error(f"[probe_engine] Batch gagal: {e}")
+            finally:
+                q.put(done)
+
+        threading.Thread(target=worker, daemon=True).start()
+    try:
+        while True:
+            item = q.get()
+            if item is done:
+                return
+            yield item
+    finally:
+        if future is not None:
+            future.cancel()
+
+
+class AsyncProbeEngine:
+    """
+    Probe engine berbasis asyncio: connect non-blocking, satu semaphore global
+    untuk semua probe, dan deadline per probe. Hasil per node sama bentuknya
+    dengan VPNTester.test_connection.
+    """
+
+    def __init__(self, concurrency=DEFAULT_CONCURRENCY, connect_timeout=2, deadline=5,
+                 geo_lookup=None, icmp=True, check_443=True, pinger=None,
+                 samples=5, sample_window=1.0, geo_workers=64):
+        self.concurrency = concurrency
+        self.connect_timeout = connect_timeout
+        self.deadline = deadline
+        self.geo_lookup = geo_lookup
+        self.icmp = icmp
+        self.check_443 = check_443
+        self.pinger = pinger or (Pinger() if icmp else None)
+        self.samples = samples
+        self.sample_window = sample_window
+        # Geo lookup bisa blocking sampai beberapa detik (HTTP fallback), jadi punya
+        # pool sendiri supaya tidak antri dengan ping/pekerjaan lain di default executor
+        self.geo_workers = geo_workers
+        self._geo_pool = None
+        self._geo_lock = threading.Lock()
+
+    def probe_budget(self, concurrency=None):
+        """Probe bersamaan yang muat di batas fd: tiap probe memegang maks. 2 socket (port + 443)."""
+        per_probe = 2 if self.check_443 else 1
+        return max(1, min(concurrency or self.concurrency, socket_budget() // per_probe))
+
+    async def tcp_connect(self, ip, port, timeout=None):
+        """Return waktu connect dalam ms, atau None kalau gagal."""
+        loop = asyncio.get_running_loop()
+        sock = None
+        try:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setblocking(False)
+            start = time.perf_counter()
+            await asyncio.wait_for(loop.sock_connect(sock, (ip, port)), timeout or self.connect_timeout)
+            return (time.perf_counter() - start) * 1000
+        except asyncio.TimeoutError:
+            return None
+        except OSError as e:
+            if e.errno in (errno.EMFILE, errno.ENFILE):
+                logging.warning(f"[probe_engine] Socket habis saat connect {ip}:{port}: {e}")
+            return None
+        finally:
+            if sock is not None:
+                sock.close()
+
+    async def tcp_check(self, ip, port, timeout=None):
+        return await self.tcp_connect(ip, port, timeout) is not None
+
+    async def tcp_samples(self, ip, port, count=None, window=None, end=None):
+        """
+        Ambil beberapa sampel waktu handshake TCP berurutan (satu socket per
+        probe), disebar merata di window (detik). Semua sampel harus selesai
+        sebelum `end` (loop.time()); sampel yang tidak sempat tidak dihitung.
+        Return (list ms yang berhasil sesuai urutan, jumlah percobaan).
+        """
+        count = count or self.samples
+        window = self.sample_window if window is None else window
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        end = end or start + self.deadline
+        interval = window / count
+        values = []
+        sent = 0
+        for i in range(count):
+            await asyncio.sleep(max(0, start + i * interval - loop.time()))
+            remaining = end - loop.time()
+            if remaining <= 0:
+                break
+            sent += 1
+            ms = await self.tcp_connect(ip, port, min(self.connect_timeout, remaining))
+            if ms is not None:
+                values.append(ms)
+        return values, sent
+
+    async def icmp_check(self, ip, ping_future=None):
+        if self.pinger and self.pinger.available:
+            loop = asyncio.get_running_loop()
+            if ping_future is None:
+                ping_future = loop.run_in_executor(None, self.pinger.ping_many, [ip])
+            stats = (await asyncio.shield(ping_future)).get(ip)
+            if stats and stats['rtts']:
+                return True, sum(stats['rtts']) / len(stats['rtts'])
+            return False, None
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                'ping', '-c', '3', '-W', '2', ip,
+                stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL
+            )
+        except OSError:
+            return False, None
+        try:
+            stdout, _ = await proc.communicate()
+        except asyncio.CancelledError:
+            proc.kill()
+            raise
+        output = stdout.decode(errors='ignore').lower()
+        if 'ttl=' in output or 'time=' in output:
+            latency = re.search(r'=(\d+\.\d+)\s*ms', output)
+            return True, float(latency.group(1)) if latency else None
+        return False, None
+
+    async def geo_check(self, ip):
+        if not self.geo_lookup:
+            return None
+        loop = asyncio.get_running_loop()
+        with self._geo_lock:
+            if self._geo_pool is None:
+                self._geo_pool = ThreadPoolExecutor(max_workers=self.geo_workers, thread_name_prefix="probe-geo")
+        try:
+            return await loop.run_in_executor(self._geo_pool, self.geo_lookup, ip)
+        except Exception:
+            return None
+
+    def close(self):
+        with self._geo_lock:
+            if self._geo_pool is not None:
+                self._geo_pool.shutdown(wait=False)
+                self._geo_pool = None
+
+    async def _probe(self, ip, port, ping_future=None, mode=MODE_FULL):
+        loop = asyncio.get_running_loop()
+        result = empty_result(ip, port)
+        end = loop.time() + self.deadline
+        if mode == MODE_FULL and self.samples > 1:
+            # Sedikit lebih awal dari deadline supaya hasil sampel sempat terkumpul
+            checks = {'samples': self.tcp_samples(ip, port, end=end - 0.05)}
+        else:
+            checks = {'tcp_custom': self.tcp_connect(ip, port)}
+        if self.check_443:
+            checks['tcp_443'] = self.tcp_connect(ip, 443)
+        if mode == MODE_FULL:
+            if self.icmp:
+                checks['icmp'] = self.icmp_check(ip, ping_future)
+            if self.geo_lookup:
+                checks['geo'] = self.geo_check(ip)
+        tasks = {asyncio.ensure_future(coro): name for name, coro in checks.items()}
+        pending = set(tasks)
+        connect_ms = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, timeout=max(0, end - loop.time()), return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    break
+                for task in done:
+                    name = tasks[task]
+                    if task.cancelled() or task.exception():
+                        continue
+                    value = task.result()
+                    if name == 'geo':
+                        if value:
+                            result.update(value)
+                    elif name == 'icmp':
+                        ok, latency = value
+                        result['icmp'] = '✅' if ok else '❌'
+                        if latency:
+                            result['latency'] = f"{latency:.2f} ms"
+                    elif name == 'samples':
+                        sampled, sent = value
+                        result.update(summarize(sampled, sent))
+                        if sampled:
+                            result['tcp_custom'] = '✅'
+                            result['status'] = '✅ LIVE'
+                    elif value is not None:
+                        result[name] = '✅'
+                        result['status'] = '✅ LIVE'
+                        if connect_ms is None:
+                            connect_ms = value
+                if mode == MODE_LIVENESS and result['status'] == '✅ LIVE':
+                    break
+        finally:
+            for task in pending:
+                task.cancel()
+        if connect_ms is not None and result['latency_median'] is None:
+            result.update(summarize([connect_ms], 1))
+        if result['latency_median'] is not None:
+            result['latency'] = f"{result['latency_median']:.2f} ms"
+        return result
+
+    async def probe(self, ip, port, sem=None, ping_future=None, mode=MODE_FULL):
+        if sem is None:
+            return await self._probe(ip, port, ping_future, mode)
+        async with sem:
+            return await self._probe(ip, port, ping_future, mode)
+
+    async def probe_many(self, targets, concurrency=None, mode=MODE_FULL):
+        """Async generator: yield (index, result) sesuai urutan selesai."""
+        sem = asyncio.Semaphore(self.probe_budget(concurrency))
+        targets = list(targets)
+        ping_future = None
+        if mode == MODE_FULL and self.icmp and self.pinger and self.pinger.available:
+            # Satu socket ICMP untuk semua host di batch
+            hosts = [ip for ip, _ in targets]
+            ping_future = asyncio.get_running_loop().run_in_executor(None, self.pinger.ping_many, hosts)
+
+        async def one(idx, ip, port):
+            try:
+                return idx, await self.probe(ip, port, sem, ping_future, mode)
+            except Exception as e:
+                logging.error(f"[probe_engine] Error testing {ip}:{port}: {e}")
+                return idx, empty_result(ip, port)
+
+        tasks = [asyncio.ensure_future(one(idx, ip, port)) for idx, (ip, port) in enumerate(targets)]
+        try:
+            for fut in asyncio.as_completed(tasks):
+                yield await fut
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def screen_many(self, targets, timeout=1.0, concurrency=None):
+        """
+        Pre-screen cepat: satu connect TCP dengan deadline pendek per target.
+        Async generator: yield (index, connect_ms atau None) sesuai urutan selesai.
+        """
+        # Satu socket per target, jadi concurrency tidak boleh melewati batas fd proses
+        sem = asyncio.Semaphore(socket_budget(concurrency))
+
+        async def one(idx, ip, port):
+            async with sem:
+                try:
+                    return idx, await self.tcp_connect(ip, port, timeout)
+                except OSError as e:
+                    # Mis. EMFILE: target ini dianggap gagal, batch tetap jalan
+                    logging.warning(f"[probe_engine] Screen {ip}:{port} gagal: {e}")
+                    return idx, None
+
+        tasks = [asyncio.ensure_future(one(idx, ip, port)) for idx, (ip, port) in enumerate(targets)]
+        try:
+            for fut in asyncio.as_completed(tasks):
+                yield await fut
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def iter_results(self, targets, concurrency=None, loop=None, mode=MODE_FULL):
+        """
+        Versi sinkron dari probe_many. Kalau loop diberikan (event loop yang
+        sudah jalan di thread lain), batch dijalankan di loop itu; kalau tidak,
+        dibuat event loop baru di thread terpisah.
+        """
+        targets = list(targets)
+        return iter_async(lambda: self.probe_many(targets, concurrency, mode), loop)
+
+    def run(self, targets, concurrency=None, loop=None, mode=MODE_FULL):
+        targets = list(targets)
+        results = [None] * len(targets)
+        for idx, result in self.iter_results(targets, concurrency, loop, mode):
+            results[idx] = result
+        return [r if r is not None else empty_result(*t) for r, t in zip(results, targets)]
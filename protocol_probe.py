@@ -0,0 +1,182 @@
+import asyncio
+import base64
+import functools
+import hashlib
+import os
+import socket
+import ssl
+import time
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+def probe_profile(outbound):
+    """
+    Tentukan probe dari dict outbound hasil VPNConverter:
+    host/port tujuan, SNI TLS (kalau tls.enabled), dan path/Host WebSocket
+    (kalau transport.type == ws).
+    """
+    tls = outbound.get("tls") or {}
+    transport = outbound.get("transport") or {}
+    host = outbound.get("server")
+    profile = {
+        "host": host,
+        "port": int(outbound.get("server_port") or 443),
+        "tls": bool(tls.get("enabled")),
+        "sni": tls.get("server_name") or host,
+        "insecure": tls.get("insecure", True),
+        "ws_path": None,
+        "ws_host": None,
+    }
+    if transport.get("type") == "ws":
+        profile["ws_path"] = transport.get("path") or "/"
+        profile["ws_host"] = (transport.get("headers") or {}).get("Host") or profile["sni"] or host
+    parts = (["tls"] if profile["tls"] else []) + (["ws"] if profile["ws_path"] else [])
+    profile["name"] = "+".join(parts) or "tcp"
+    return profile
+
+
+@functools.lru_cache(maxsize=None)
+def tls_context(insecure=True, alpn=("http/1.1",)):
+    """SSLContext dibuat sekali per kombinasi (insecure, alpn) lalu dipakai ulang semua probe."""
+    ctx = ssl.create_default_context()
+    if insecure:
+        ctx.check_hostname = False
+        ctx.verify_mode = ssl.CERT_NONE
+    if alpn:
+        ctx.set_alpn_protocols(list(alpn))
+    return ctx
+
+
+# Context default dibangun saat import, bukan di probe pertama
+tls_context(True)
+tls_context(False)
+
+
+def ws_upgrade_request(path, host, key):
+    return (
+        f"GET {path} HTTP/1.1\r\n"
+        f"Host: {host}\r\n"
+        "Upgrade: websocket\r\n"
+        "Connection: Upgrade\r\n"
+        f"Sec-WebSocket-Key: {key}\r\n"
+        "Sec-WebSocket-Version: 13\r\n"
+        "User-Agent: Mozilla/5.0\r\n"
+        "\r\n"
+    ).encode()
+
+
+def ws_accept(key):
+    return base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+
+
+async def read_http_head(reader, limit=16384):
+    """Baca status line + header HTTP. Return (status_code, {header: value})."""
+    head = await reader.readuntil(b"\r\n\r\n")
+    if len(head) > limit:
+        raise ValueError("HTTP header terlalu panjang")
+    lines = head.decode("latin-1").split("\r\n")
+    parts = lines[0].split(" ", 2)
+    status = int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else 0
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            k, v = line.split(":", 1)
+            headers[k.strip().lower()] = v.strip()
+    return status, headers
+
+
+async def open_transport(profile, timeout=5, address=None, timings=None):
+    """
+    Buka koneksi sesuai profile: TCP connect, lalu TLS (SNI), lalu upgrade WS.
+    Return (reader, writer, timings) dengan timings dalam ms per tahap; kalau
+    dict timings diberikan, tahap yang sudah selesai tetap tercatat walau gagal.
+    `address` bisa dipakai untuk override (ip, port) tujuan. timeout berlaku per
+    tahap; None = tanpa batas per tahap (pemanggil memasang deadline sendiri).
+    """
+    loop = asyncio.get_running_loop()
+    host, port = address or (profile["host"], profile["port"])
+    if timings is None:
+        timings = {}
+    timings.update({"connect_ms": None, "tls_ms": None, "upgrade_ms": None})
+
+    infos = await asyncio.wait_for(
+        loop.getaddrinfo(host, port, family=socket.AF_INET, type=socket.SOCK_STREAM), timeout
+    )
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setblocking(False)
+    try:
+        start = time.perf_counter()
+        await asyncio.wait_for(loop.sock_connect(sock, infos[0][4]), timeout)
+        timings["connect_ms"] = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        if profile["tls"]:
+            reader, writer = await asyncio.wait_for(asyncio.open_connection(
+                sock=sock, ssl=tls_context(profile["insecure"]), server_hostname=profile["sni"]
+            ), timeout)
+            timings["tls_ms"] = (time.perf_counter() - start) * 1000
+        else:
+            reader, writer = await asyncio.open_connection(sock=sock)
+    except BaseException:
+        sock.close()
+        raise
+
+    try:
+        if profile["ws_path"]:
+            key = base64.b64encode(os.urandom(16)).decode()
+            start = time.perf_counter()
+            writer.write(ws_upgrade_request(profile["ws_path"], profile["ws_host"], key))
+            await writer.drain()
+            status, headers = await asyncio.wait_for(read_http_head(reader), timeout)
+            if status != 101:
+                raise ConnectionError(f"WebSocket upgrade ditolak: HTTP {status}")
+            if headers.get("sec-websocket-accept") != ws_accept(key):
+                raise ConnectionError("Sec-WebSocket-Accept tidak cocok")
+            timings["upgrade_ms"] = (time.perf_counter() - start) * 1000
+    except BaseException:
+        writer.close()
+        raise
+    return reader, writer, timings
+
+
+async def probe_outbound(outbound, timeout=5, address=None):
+    """
+    Probe protokol untuk satu outbound. Return dict:
+    protocol, protocol_ok, connect_ms, tls_ms, upgrade_ms, protocol_error.
+    """
+    result = {"protocol": None, "protocol_ok": False,
+              "connect_ms": None, "tls_ms": None, "upgrade_ms": None, "protocol_error": None}
+    timings = {}
+    try:
+        # Outbound rusak (mis. server_port bukan angka) jadi protocol_error, bukan exception
+        profile = probe_profile(outbound)
+        result["protocol"] = profile["name"]
+        # Satu deadline untuk seluruh probe (DNS + connect + TLS + upgrade)
+        _, writer, _ = await asyncio.wait_for(open_transport(profile, None, address, timings), timeout)
+        result["protocol_ok"] = True
+        writer.close()
+    except asyncio.TimeoutError:
+        result["protocol_error"] = "timeout"
+    except (OSError, ValueError, TypeError, AttributeError, ConnectionError,
+            asyncio.IncompleteReadError, asyncio.LimitOverrunError) as e:
+        result["protocol_error"] = str(e) or e.__class__.__name__
+    result.update(timings)
+    return result
+
+
+async def probe_outbounds(outbounds, concurrency=200, timeout=5):
+    """Async generator: yield (index, result) sesuai urutan selesai."""
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(idx, outbound):
+        async with sem:
+            return idx, await probe_outbound(outbound, timeout)
+
+    tasks = [asyncio.ensure_future(one(i, o)) for i, o in enumerate(outbounds)]
+    try:
+        for fut in asyncio.as_completed(tasks):
+            yield await fut
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,85 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+from node_index import outbound_fingerprint
+
+DEFAULT_RESULT_FILE = os.environ.get("RESULT_STORE_FILE", "result_store.json")
+DEFAULT_MAX_AGE = int(os.environ.get("RETEST_MAX_AGE", "1800"))
+
+
+def result_key(cfg):
+    """
+    Key hasil test: fingerprint node + path di top level. Trojan tanpa ws dan
+    shadowsocks dites ke IP dari path /ip-port, jadi path beda = target test beda.
+    """
+    path = str(cfg.get("path") or "").strip()
+    return hashlib.sha1(f"{outbound_fingerprint(cfg)}|{path}".encode()).hexdigest()
+
+
+class ResultStore:
+    """
+    Hasil test terakhir per result_key outbound + waktu test, disimpan ke file JSON.
+    Hasil yang umurnya di bawah `max_age` detik dipakai ulang, sisanya dites lagi.
+    """
+
+    def __init__(self, path=DEFAULT_RESULT_FILE, max_age=DEFAULT_MAX_AGE, max_entries=50000):
+        self.path = path
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self.entries = {}
+        self.load()
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Gagal membaca hasil test {self.path}: {e}")
+            self.entries = {}
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            if len(self.entries) > self.max_entries:
+                # Buang yang paling lama dites
+                keep = sorted(self.entries.items(), key=lambda kv: kv[1]["tested_at"])[-self.max_entries:]
+                self.entries = dict(keep)
+            data = json.dumps(self.entries, ensure_ascii=False)
+        tmp = f"{self.path}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"Gagal menyimpan hasil test {self.path}: {e}")
+
+    def get_fresh(self, fp, now=None):
+        """Hasil test yang masih segar (copy), atau None."""
+        now = now or time.time()
+        with self._lock:
+            entry = self.entries.get(fp)
+            if not entry or now - entry["tested_at"] > self.max_age:
+                return None
+            return dict(entry["result"])
+
+    def put(self, fp, result, now=None):
+        with self._lock:
+            self.entries[fp] = {"tested_at": now or time.time(), "result": dict(result)}
+
+    def partition(self, configs, now=None):
+        """Return (fresh {index: hasil}, daftar index yang perlu dites) untuk list outbound."""
+        fresh, todo = {}, []
+        for idx, cfg in enumerate(configs):
+            result = self.get_fresh(result_key(cfg), now)
+            if result is None:
+                todo.append(idx)
+            else:
+                fresh[idx] = result
+        return fresh, todo
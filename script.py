@@ -1,62 +1,96 @@
 import json
+import os
 import urllib.parse
 import base64
 import re
-import socket
-import requests
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import dns_cache
+from github_client import GitHubClient
+from storage import StorageError, open_storage
 from utils_extract import ensure_path_ip_port
+from endpoint import extract_ip_port
+from probe_engine import AsyncProbeEngine, socket_budget, MODE_LIVENESS
+from pipeline import Pipeline, Stage
+from geoip_db import http_fallback_enabled, open_database
+from geo_client import GeoClient
+
+def parse_config(content):
+    try:
+        return json.loads(content)
+    except Exception:
+        try:
+            import yaml
+            return yaml.safe_load(content)
+        except Exception:
+            return content
+
+def render_config(config):
+    return json.dumps(config, indent=2, ensure_ascii=False)
+
+class UnsupportedLinkError(ValueError):
+    """Link bukan vmess/vless/trojan/ss."""
 
 class VPNConverter:
-    def __init__(self, github_repo="", github_token="", template_file="", output_prefix="", download_dir=""):
+    def __init__(self, github_repo="", github_token="", template_file="", output_prefix="", download_dir="",
+                 storage=None):
         self.GITHUB_REPO = github_repo
         self.GITHUB_TOKEN = github_token
         self.TEMPLATE_FILE = template_file
         self.OUTPUT_PREFIX = output_prefix
         self.DOWNLOAD_DIR = download_dir
+        self._github = None
+        self._storage = storage
+
+    @property
+    def github(self):
+        if self._github is None:
+            self._github = GitHubClient(self.GITHUB_REPO, self.GITHUB_TOKEN)
+        return self._github
+
+    @property
+    def storage(self):
+        # Backend dipilih lewat env CONFIG_STORAGE (github/mirror/dir), default REST API GitHub
+        if self._storage is None:
+            kind = os.environ.get("CONFIG_STORAGE", "github")
+            self._storage = open_storage(kind, self.GITHUB_REPO, self.GITHUB_TOKEN,
+                                         client=self.github if kind == "github" else None)
+        return self._storage
 
     def get_github_files(self):
-        url = f"https://api.github.com/repos/{self.GITHUB_REPO}/contents/"
-        headers = {"Authorization": f"token {self.GITHUB_TOKEN}"} if self.GITHUB_TOKEN else {}
-        r = requests.get(url, headers=headers)
-        if r.status_code != 200:
+        try:
+            return self.storage.list_files()
+        except StorageError as e:
+            print(f"Gagal mengambil daftar file config: {e}")
             return []
-        return [f['name'] for f in r.json() if f['name'].endswith('.txt') or f['name'].endswith('.json')]
 
     def get_file_from_github(self, filename):
-        url = f"https://api.github.com/repos/{self.GITHUB_REPO}/contents/{filename}"
-        headers = {"Authorization": f"token {self.GITHUB_TOKEN}"} if self.GITHUB_TOKEN else {}
-        r = requests.get(url, headers=headers)
-        if r.status_code != 200:
+        try:
+            content = self.storage.read_file(filename)
+        except StorageError as e:
+            print(f"Gagal mengambil {filename}: {e}")
             return None
-        content = base64.b64decode(r.json()['content']).decode('utf-8')
+        return parse_config(content) if content is not None else None
+
+    def load_github_configs(self):
+        """Semua config .txt/.json sekaligus (GitHub: satu request tree + blob yang berubah)."""
         try:
-            return json.loads(content)
-        except Exception:
-            try:
-                import yaml
-                return yaml.safe_load(content)
-            except Exception:
-                return content
+            files = self.storage.load_files()
+        except StorageError as e:
+            print(f"Gagal memuat config: {e}")
+            return {}
+        return {name: parse_config(content) for name, content in files.items()}
 
     def upload_to_github(self, config, filename, message):
-        url = f"https://api.github.com/repos/{self.GITHUB_REPO}/contents/{filename}"
-        headers = {
-            "Authorization": f"token {self.GITHUB_TOKEN}",
-            "Accept": "application/vnd.github.v3+json"
-        }
-        r = requests.get(url, headers=headers)
-        sha = None
-        if r.status_code == 200:
-            sha = r.json().get("sha")
-        content = base64.b64encode(json.dumps(config, indent=2, ensure_ascii=False).encode()).decode()
-        data = {"message": message, "content": content}
-        if sha:
-            data["sha"] = sha
-        r = requests.put(url, headers=headers, json=data)
-        print(f"API upload response: {r.status_code} {r.text}")
-        if r.status_code in [200, 201]:
-            return f"✅ Sukses upload {filename}"
-        return f"❌ Gagal upload {filename}: {r.text}"
+        """
+        Upload config ke storage. Raise StorageError kalau gagal.
+        Kalau isi sama dengan yang tersimpan, tidak ada commit (result["skipped"] = True).
+        """
+        result = self.storage.write_file(filename, render_config(config), message)
+        if not result.get("skipped"):
+            print(f"Berhasil upload config sebagai {filename}")
+        return result
 
     def parse_vmess_link(self, link):
         try:
@@ -68,6 +102,7 @@ class VPNConverter:
             return None
 
     def parse_shadowsocks_link(self, ss_link):
+        """Outbound shadowsocks dari link ss://, None kalau formatnya tidak dikenal. Raise ValueError kalau rusak."""
         try:
             if not ss_link.startswith("ss://"):
                 return None
@@ -122,251 +157,370 @@ class VPNConverter:
                 "path": path,
             }
         except Exception as e:
-            print(f"Error parsing Shadowsocks link: {e} | link: {ss_link}")
-            return None
+            raise ValueError(f"link shadowsocks tidak valid: {e}")
 
     def convert_link_to_singbox_outbound(self, link_str):
         try:
-            link_str = link_str.strip()
-            outbound_config = None
-            provider, country = "", ""
-            if link_str.startswith("vmess://"):
-                vmess_data = self.parse_vmess_link(link_str)
-                if not vmess_data:
-                    return None
-                host = vmess_data.get("add", "")
-                port = str(vmess_data.get("port", 443))
-                m = re.match(r'(\d+)', port)
-                port = m.group(1) if m else "443"
-                outbound_config = {
-                    "type": "vmess",
-                    "tag": vmess_data.get("ps", host),
-                    "server": host,
-                    "server_port": int(port),
-                    "uuid": vmess_data.get("id", ""),
-                    "alter_id": int(vmess_data.get("aid", 0)),
-                    "security": vmess_data.get("scy", "auto"),
-                    "network": vmess_data.get("net", "tcp"),
-                    "domain_strategy": "ipv4_only",
-                    "multiplex": {
-                        "protocol": "smux",
-                        "max_streams": 32
-                    }
+            return self._convert_link(link_str)
+        except UnsupportedLinkError:
+            # Baris yang bukan link proxy memang dilewati diam-diam
+            return None
+        except Exception as e:
+            print(f"Error saat mengkonversi link {link_str}: {e}")
+            return None
+
+    def convert_many(self, links, chunk_size=2000, processes=None):
+        """
+        Generator: konversi banyak link, yield (index, outbound, error) sesuai urutan input.
+        Salah satu dari outbound/error selalu None. Hostname di tiap chunk di-resolve
+        sekaligus (paralel) sebelum parsing. processes > 1 membagi chunk ke process pool.
+        """
+        idx = 0
+        if not processes or processes <= 1:
+            for chunk in _chunked(links, chunk_size):
+                dns_cache.resolve_many(link_host(l) for l in chunk)
+                for outbound, error in _convert_links(self, chunk):
+                    yield idx, outbound, error
+                    idx += 1
+            return
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            window = deque()
+            for chunk in _chunked(links, chunk_size):
+                # DNS di-resolve di proses utama (cache bersama), hasilnya dikirim ke worker
+                resolved = dns_cache.resolve_many(link_host(l) for l in chunk)
+                window.append(pool.submit(_convert_chunk, chunk, resolved))
+                if len(window) < processes * 2:
+                    continue
+                for outbound, error in window.popleft().result():
+                    yield idx, outbound, error
+                    idx += 1
+            while window:
+                for outbound, error in window.popleft().result():
+                    yield idx, outbound, error
+                    idx += 1
+
+    def _convert_link(self, link_str):
+        link_str = link_str.strip()
+        outbound_config = None
+        provider, country = "", ""
+        if link_str.startswith("vmess://"):
+            vmess_data = self.parse_vmess_link(link_str)
+            if not vmess_data:
+                raise ValueError("link vmess tidak valid")
+            host = vmess_data.get("add", "")
+            port = str(vmess_data.get("port", 443))
+            m = re.match(r'(\d+)', port)
+            port = m.group(1) if m else "443"
+            outbound_config = {
+                "type": "vmess",
+                "tag": vmess_data.get("ps", host),
+                "server": host,
+                "server_port": int(port),
+                "uuid": vmess_data.get("id", ""),
+                "alter_id": int(vmess_data.get("aid", 0)),
+                "security": vmess_data.get("scy", "auto"),
+                "network": vmess_data.get("net", "tcp"),
+                "domain_strategy": "ipv4_only",
+                "multiplex": {
+                    "protocol": "smux",
+                    "max_streams": 32
+                }
+            }
+            tls_enabled = vmess_data.get("tls", "") == "tls"
+            tls_dict = {
+                "enabled": tls_enabled,
+                "server_name": vmess_data.get("host", host),
+                "insecure": True
+            }
+            if vmess_data.get("fp"):
+                tls_dict["utls"] = {"enabled": True, "fingerprint": vmess_data.get("fp")}
+            outbound_config["tls"] = tls_dict
+            if vmess_data.get("net") == "ws":
+                outbound_config["transport"] = {
+                    "type": "ws",
+                    "path": ensure_path_ip_port(f"/{host}-{port}"),
+                    "headers": {"Host": vmess_data.get("host", host)}
+                }
+            elif vmess_data.get("net") == "grpc":
+                outbound_config["transport"] = {
+                    "type": "grpc",
+                    "service_name": vmess_data.get("path", "").strip('/')
                 }
-                tls_enabled = vmess_data.get("tls", "") == "tls"
-                tls_dict = {
-                    "enabled": tls_enabled,
-                    "server_name": vmess_data.get("host", host),
+            tag = outbound_config.get("tag", "")
+            m = re.search(r"\((\w{2})\)\s*([^(]+)", tag)
+            if m:
+                country = m.group(1)
+                provider = m.group(2).strip()
+            outbound_config["provider"] = provider
+            outbound_config["country"] = country
+            return outbound_config
+        elif link_str.startswith("vless://"):
+            url_no_schema = link_str[len("vless://"):]
+            userinfo, rest = url_no_schema.split("@", 1)
+            if "?" in rest:
+                serverhost, paramfrag = rest.split("?", 1)
+            else:
+                serverhost, paramfrag = rest, ""
+            if "#" in paramfrag:
+                params, frag = paramfrag.split("#", 1)
+            else:
+                params, frag = paramfrag, ""
+            if ":" in serverhost:
+                host, port = serverhost.split(":", 1)
+            else:
+                host, port = serverhost, "443"
+            m = re.match(r'(\d+)', port)
+            port = m.group(1) if m else "443"
+            query_params = urllib.parse.parse_qs(params)
+            tag = urllib.parse.unquote(frag) if frag else f"{host}"
+            outbound_config = {
+                "type": "vless",
+                "tag": tag,
+                "domain_strategy": "ipv4_only",
+                "server": host,
+                "server_port": int(port),
+                "uuid": userinfo,
+                "tls": {
+                    "enabled": query_params.get("security", [""])[0] == "tls",
+                    "server_name": query_params.get("host", [host])[0],
                     "insecure": True
+                },
+                "multiplex": {
+                    "protocol": "smux",
+                    "max_streams": 32
                 }
-                if vmess_data.get("fp"):
-                    tls_dict["utls"] = {"enabled": True, "fingerprint": vmess_data.get("fp")}
-                outbound_config["tls"] = tls_dict
-                if vmess_data.get("net") == "ws":
-                    outbound_config["transport"] = {
-                        "type": "ws",
-                        "path": ensure_path_ip_port(f"/{host}-{port}"),
-                        "headers": {"Host": vmess_data.get("host", host)}
-                    }
-                elif vmess_data.get("net") == "grpc":
-                    outbound_config["transport"] = {
-                        "type": "grpc",
-                        "service_name": vmess_data.get("path", "").strip('/')
-                    }
-                tag = outbound_config.get("tag", "")
-                m = re.search(r"\((\w{2})\)\s*([^(]+)", tag)
-                if m:
-                    country = m.group(1)
-                    provider = m.group(2).strip()
-                outbound_config["provider"] = provider
-                outbound_config["country"] = country
-                return outbound_config
-            elif link_str.startswith("vless://"):
-                url_no_schema = link_str[len("vless://"):]
-                userinfo, rest = url_no_schema.split("@", 1)
-                if "?" in rest:
-                    serverhost, paramfrag = rest.split("?", 1)
-                else:
-                    serverhost, paramfrag = rest, ""
-                if "#" in paramfrag:
-                    params, frag = paramfrag.split("#", 1)
-                else:
-                    params, frag = paramfrag, ""
-                if ":" in serverhost:
-                    host, port = serverhost.split(":", 1)
-                else:
-                    host, port = serverhost, "443"
-                m = re.match(r'(\d+)', port)
-                port = m.group(1) if m else "443"
-                query_params = urllib.parse.parse_qs(params)
-                tag = urllib.parse.unquote(frag) if frag else f"{host}"
-                outbound_config = {
-                    "type": "vless",
-                    "tag": tag,
-                    "domain_strategy": "ipv4_only",
-                    "server": host,
-                    "server_port": int(port),
-                    "uuid": userinfo,
-                    "tls": {
-                        "enabled": query_params.get("security", [""])[0] == "tls",
-                        "server_name": query_params.get("host", [host])[0],
-                        "insecure": True
-                    },
-                    "multiplex": {
-                        "protocol": "smux",
-                        "max_streams": 32
+            }
+            network_type = query_params.get("type", ["tcp"])[0]
+            if network_type == "ws":
+                outbound_config["transport"] = {
+                    "type": "ws",
+                    "path": ensure_path_ip_port(f"/{host}-{port}"),
+                    "headers": {
+                        "Host": query_params.get("host", [host])[0]
                     }
                 }
-                network_type = query_params.get("type", ["tcp"])[0]
-                if network_type == "ws":
-                    outbound_config["transport"] = {
-                        "type": "ws",
-                        "path": ensure_path_ip_port(f"/{host}-{port}"),
-                        "headers": {
-                            "Host": query_params.get("host", [host])[0]
-                        }
-                    }
-                elif network_type == "grpc":
-                    outbound_config["transport"] = {
-                        "type": "grpc",
-                        "service_name": query_params.get("serviceName", [""])[0]
-                    }
-                if "fp" in query_params:
-                    outbound_config["tls"]["utls"] = {"enabled": True, "fingerprint": query_params["fp"][0]}
-                m = re.search(r"\((\w{2})\)\s*([^(]+)", tag)
-                if m:
-                    country = m.group(1)
-                    provider = m.group(2).strip()
-                outbound_config["provider"] = provider
-                outbound_config["country"] = country
-                return outbound_config
-            elif link_str.startswith("trojan://"):
-                url_no_schema = link_str[len("trojan://"):]
-                userinfo, rest = url_no_schema.split("@", 1)
-                if "?" in rest:
-                    serverhost, paramfrag = rest.split("?", 1)
-                else:
-                    serverhost, paramfrag = rest, ""
-                if "#" in paramfrag:
-                    params, frag = paramfrag.split("#", 1)
-                else:
-                    params, frag = paramfrag, ""
-                if ":" in serverhost:
-                    host, port = serverhost.split(":", 1)
-                else:
-                    host, port = serverhost, "443"
-                m = re.match(r'(\d+)', port)
-                port = m.group(1) if m else "443"
-                query_params = urllib.parse.parse_qs(params)
-                tag = urllib.parse.unquote(frag) if frag else f"{host}"
-                path = ensure_path_ip_port(f"/{host}-{port}")
-                transport = None
-                if query_params.get("type", [""]) == ["ws"]:
-                    transport = {
-                        "type": "ws",
-                        "path": path,
-                        "headers": {
-                            "Host": query_params.get("host", [host])[0]
-                        },
-                        "early_data_header_name": "Sec-WebSocket-Protocol"
-                    }
-                outbound_config = {
-                    "type": "trojan",
-                    "tag": tag,
-                    "server": host,
-                    "server_port": int(port),
-                    "password": userinfo,
-                    "multiplex": {
-                        "protocol": "smux",
-                        "max_streams": 32
-                    },
-                    "domain_strategy": "ipv4_only",
-                    "tls": {
-                        "enabled": query_params.get("security", [""])[0] == "tls",
-                        "server_name": query_params.get("sni", [host])[0],
-                        "insecure": True
-                    }
+            elif network_type == "grpc":
+                outbound_config["transport"] = {
+                    "type": "grpc",
+                    "service_name": query_params.get("serviceName", [""])[0]
                 }
-                if transport:
-                    outbound_config["transport"] = transport
-                outbound_config["path"] = path
-                m = re.search(r"\((\w{2})\)\s*([^(]+)", tag)
-                if m:
-                    country = m.group(1)
-                    provider = m.group(2).strip()
-                outbound_config["provider"] = provider
-                outbound_config["country"] = country
-                return outbound_config
-            elif link_str.startswith("ss://"):
-                outbound_config = self.parse_shadowsocks_link(link_str)
-                if not outbound_config:
-                    return None
-                tag = outbound_config.get("tag", "")
-                m = re.search(r"\((\w{2})\)\s*([^(]+)", tag)
-                if m:
-                    country = m.group(1)
-                    provider = m.group(2).strip()
-                outbound_config["provider"] = provider
-                outbound_config["country"] = country
-                return outbound_config
+            if "fp" in query_params:
+                outbound_config["tls"]["utls"] = {"enabled": True, "fingerprint": query_params["fp"][0]}
+            m = re.search(r"\((\w{2})\)\s*([^(]+)", tag)
+            if m:
+                country = m.group(1)
+                provider = m.group(2).strip()
+            outbound_config["provider"] = provider
+            outbound_config["country"] = country
+            return outbound_config
+        elif link_str.startswith("trojan://"):
+            url_no_schema = link_str[len("trojan://"):]
+            userinfo, rest = url_no_schema.split("@", 1)
+            if "?" in rest:
+                serverhost, paramfrag = rest.split("?", 1)
             else:
-                return None
-        except Exception as e:
-            print(f"Error saat mengkonversi link {link_str}: {e}")
-            return None
-
-def test_node(node):
-    # Tes menggunakan IP hasil path kalau ada, fallback ke server/domain
-    ip = node.get("server")
-    port = node.get("server_port")
-    m = re.match(r"/(\d{1,3}(?:\.\d{1,3}){3})-(\d+)", str(node.get("path", "")))
-    if m:
-        ip = m.group(1)
-        port = int(m.group(2))
-    try:
-        s = socket.create_connection((ip, port), timeout=2)
-        s.close()
-        return True
-    except Exception:
-        return False
+                serverhost, paramfrag = rest, ""
+            if "#" in paramfrag:
+                params, frag = paramfrag.split("#", 1)
+            else:
+                params, frag = paramfrag, ""
+            if ":" in serverhost:
+                host, port = serverhost.split(":", 1)
+            else:
+                host, port = serverhost, "443"
+            m = re.match(r'(\d+)', port)
+            port = m.group(1) if m else "443"
+            query_params = urllib.parse.parse_qs(params)
+            tag = urllib.parse.unquote(frag) if frag else f"{host}"
+            path = ensure_path_ip_port(f"/{host}-{port}")
+            transport = None
+            if query_params.get("type", [""]) == ["ws"]:
+                transport = {
+                    "type": "ws",
+                    "path": path,
+                    "headers": {
+                        "Host": query_params.get("host", [host])[0]
+                    },
+                    "early_data_header_name": "Sec-WebSocket-Protocol"
+                }
+            outbound_config = {
+                "type": "trojan",
+                "tag": tag,
+                "server": host,
+                "server_port": int(port),
+                "password": userinfo,
+                "multiplex": {
+                    "protocol": "smux",
+                    "max_streams": 32
+                },
+                "domain_strategy": "ipv4_only",
+                "tls": {
+                    "enabled": query_params.get("security", [""])[0] == "tls",
+                    "server_name": query_params.get("sni", [host])[0],
+                    "insecure": True
+                }
+            }
+            if transport:
+                outbound_config["transport"] = transport
+            outbound_config["path"] = path
+            m = re.search(r"\((\w{2})\)\s*([^(]+)", tag)
+            if m:
+                country = m.group(1)
+                provider = m.group(2).strip()
+            outbound_config["provider"] = provider
+            outbound_config["country"] = country
+            return outbound_config
+        elif link_str.startswith("ss://"):
+            outbound_config = self.parse_shadowsocks_link(link_str)
+            if not outbound_config:
+                raise ValueError("link shadowsocks tidak valid")
+            tag = outbound_config.get("tag", "")
+            m = re.search(r"\((\w{2})\)\s*([^(]+)", tag)
+            if m:
+                country = m.group(1)
+                provider = m.group(2).strip()
+            outbound_config["provider"] = provider
+            outbound_config["country"] = country
+            return outbound_config
+        else:
+            raise UnsupportedLinkError("skema link tidak didukung")
 
-def get_country_isp(ip):
+def link_host(link):
+    """Hostname server di link (tanpa parsing penuh), untuk resolve DNS sekaligus."""
     try:
-        r = requests.get(f'http://ip-api.com/json/{ip}?fields=countryCode,isp', timeout=4)
-        if r.status_code == 200:
-            data = r.json()
-            country = data.get('countryCode', 'XX')
-            isp = data.get('isp', 'Unknown')
-            return country, isp
+        link = link.strip()
+        if link.startswith("vmess://"):
+            b64 = link[8:]
+            data = json.loads(base64.urlsafe_b64decode(b64 + '=' * (-len(b64) % 4)).decode('utf-8'))
+            return data.get("add") or None
+        if link.startswith(("vless://", "trojan://")):
+            rest = link.split("://", 1)[1].split("@", 1)[1]
+            return re.split(r'[:?#/]', rest, 1)[0] or None
+        if link.startswith("ss://"):
+            body = link[5:].split("#", 1)[0].split("/?", 1)[0]
+            if '@' not in body:
+                body = base64.urlsafe_b64decode(body + '=' * (-len(body) % 4)).decode('utf-8')
+            return body.rsplit("@", 1)[1].split(":", 1)[0] or None
     except Exception:
         pass
+    return None
+
+def _chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _convert_links(converter, links):
+    out = []
+    for link in links:
+        try:
+            out.append((converter._convert_link(link), None))
+        except Exception as e:
+            out.append((None, str(e) or type(e).__name__))
+    return out
+
+def _convert_chunk(links, resolved):
+    # Jalan di process pool: isi cache DNS worker dengan hasil resolve dari proses utama
+    dns_cache.prime(resolved)
+    return _convert_links(VPNConverter(), links)
+
+def node_target(node):
+    # Tes menggunakan IP hasil path kalau ada, fallback ke server/domain
+    return extract_ip_port(node, fallback_server=True)
+
+_geoip = None
+_geo_client = None
+_geo_lock = threading.Lock()
+
+def get_country_isp(ip, http_fallback=None):
+    global _geoip, _geo_client
+    if _geoip is None:
+        with _geo_lock:
+            if _geoip is None:
+                _geoip = open_database() or False
+    if _geoip:
+        local = _geoip.lookup(ip)
+        if local:
+            return local["country"], local["provider"]
+    if http_fallback is None:
+        http_fallback = http_fallback_enabled()
+    if not http_fallback:
+        return "XX", "Unknown"
+    if _geo_client is None:
+        with _geo_lock:
+            if _geo_client is None:
+                _geo_client = GeoClient()
+    info = _geo_client.lookup(ip)
+    if info:
+        return info["country"], info["provider"]
     return "XX", "Unknown"
 
 def generate_final_tag(country, isp, idx):
     return f"{country} {isp} {idx:02d}"
 
-def process_links(links):
+def build_link_pipeline(converter=None, convert_workers=2, probe_workers=2, geo_workers=16,
+                        queue_size=2000, convert_batch=500, probe_batch=1000):
+    """
+    convert -> test koneksi -> negara/ISP, tiap tahap punya antrian dan jumlah worker sendiri.
+    Convert dan probe jalan per batch: convert_many (DNS satu chunk sekaligus) dan
+    AsyncProbeEngine (semua connect di satu event loop), bukan satu thread per link.
+    """
+    converter = converter or VPNConverter()
+    # Cukup satu connect TCP ke port node; budget socket dibagi rata antar worker probe
+    engine = AsyncProbeEngine(concurrency=max(1, socket_budget() // probe_workers),
+                              icmp=False, check_443=False)
+
+    def convert(links):
+        outbounds = []
+        for _, outbound, error in converter.convert_many(links, chunk_size=convert_batch):
+            if error:
+                print(f"Gagal convert link: {error}")
+            outbounds.append(outbound)
+        return outbounds
+
+    def probe(nodes):
+        results = engine.run([node_target(n) for n in nodes], mode=MODE_LIVENESS)
+        return [n if r['status'] == '✅ LIVE' else None for n, r in zip(nodes, results)]
+
+    def geo(node):
+        # Untuk info negara/ISP, tetap gunakan IP dari path kalau ada
+        country, isp = get_country_isp(node_target(node)[0])
+        node["provider"] = isp
+        node["country"] = country
+        return node
+
+    return Pipeline([
+        Stage("convert", convert, convert_workers, queue_size, batch_size=convert_batch),
+        Stage("probe", probe, probe_workers, queue_size, batch_size=probe_batch),
+        Stage("geo", geo, geo_workers, queue_size),
+    ])
+
+def process_links(links, pipeline=None):
+    """Node LIVE dengan tag final, urut sesuai input. Return list outbound."""
+    pipeline = pipeline or build_link_pipeline()
+    # Hasil keluar sesuai urutan selesai; nomor tag tetap mengikuti urutan input
+    done = sorted(pipeline.run(links), key=lambda entry: entry[0])
+    pipeline.log_stats("[process_links]")
     outbounds = []
-    idx = 1
-    converter = VPNConverter()
-    for link in links:
-        node = converter.convert_link_to_singbox_outbound(link)
-        if node and test_node(node):
-            ip = node.get("server")
-            # Untuk info negara/ISP, tetap gunakan IP dari path kalau ada
-            m = re.match(r"/(\d{1,3}(?:\.\d{1,3}){3})-(\d+)", str(node.get("path", "")))
-            if m:
-                ip = m.group(1)
-            country, isp = get_country_isp(ip)
-            tag = generate_final_tag(country, isp, idx)
-            node["tag"] = tag
-            node["provider"] = isp
-            node["country"] = country
-            outbounds.append(node)
-            idx += 1
+    for idx, (_, node) in enumerate(done, 1):
+        node["tag"] = generate_final_tag(node["country"], node["provider"], idx)
+        outbounds.append(node)
     return outbounds
 
 if __name__ == "__main__":
+    import sys
+    from subscription import SubscriptionSource
+    if len(sys.argv) > 1:
+        # python script.py URL_SUBSCRIPTION... -> link diambil dari feed.
+        # Selalu fetch penuh: feed yang 304 (tidak berubah) tetap harus menghasilkan link
+        hasil = process_links(SubscriptionSource(sys.argv[1:]).links(conditional=False))
+        print(json.dumps(hasil, indent=2, ensure_ascii=False))
+        sys.exit(0)
     links = [
         # Masukkan link vmess, vless, trojan, ss
         "vmess://eyJhZGQiOiIxLjEuMS4xIiwicG9ydCI6IjQ0MyIsImlkIjoiYTAwMDAwMC1hYWJiLTAwMDAiLCJhaWQiOiIwIiwic2N5IjoiYXV0byIsIm5ldCI6IndzIiwidGxzIjoidGxzIiwicHMiOiJUZXN0IFZNRVNTIn0=",
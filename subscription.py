@@ -0,0 +1,163 @@
+import base64
+import codecs
+import json
+import logging
+import os
+import re
+import threading
+
+import requests
+
+DEFAULT_STATE_FILE = os.environ.get("SUBSCRIPTION_STATE_FILE", "subscription_state.json")
+CHUNK_SIZE = 64 * 1024
+SNIFF_BYTES = 64
+B64_CHARS = re.compile(rb'[A-Za-z0-9+/=_\-]+')
+
+
+def iter_lines(chunks):
+    """Potong aliran bytes jadi baris teks (utf-8) tanpa menggabungkan seluruh body."""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    tail = ""
+    for chunk in chunks:
+        text = tail + decoder.decode(chunk)
+        lines = text.split("\n")
+        tail = lines.pop()
+        for line in lines:
+            line = line.strip()
+            if line:
+                yield line
+    tail = (tail + decoder.decode(b"", final=True)).strip()
+    if tail:
+        yield tail
+
+
+def iter_b64_decoded(chunks):
+    """Decode base64 (standar atau urlsafe, boleh tanpa padding/berbaris) per potongan."""
+    pending = b""
+    for chunk in chunks:
+        pending += b"".join(B64_CHARS.findall(chunk)).replace(b"-", b"+").replace(b"_", b"/")
+        cut = len(pending) - len(pending) % 4
+        if cut:
+            data, pending = pending[:cut], pending[cut:]
+            yield base64.b64decode(data)
+    pending = pending.rstrip(b"=")
+    if pending:
+        yield base64.b64decode(pending + b"=" * (-len(pending) % 4))
+
+
+def iter_feed_links(chunks):
+    """
+    Deteksi format feed dari awal body: daftar link biasa atau base64. Potongan
+    dikumpulkan sampai ada satu baris penuh atau SNIFF_BYTES isi (atau body habis),
+    karena potongan pertama bisa saja hanya beberapa byte.
+    """
+    chunks = iter(chunks)
+    first = b""
+    for chunk in chunks:
+        first += chunk
+        head = first.lstrip()
+        if b"\n" in head or len(head) >= SNIFF_BYTES:
+            break
+
+    def rest():
+        yield first
+        yield from chunks
+
+    if b"://" in first:
+        return iter_lines(rest())
+    return iter_lines(iter_b64_decoded(rest()))
+
+
+class SubscriptionSource:
+    """
+    Sumber link dari URL subscription (base64 atau plain, satu link per baris).
+    Fetch memakai ETag/If-Modified-Since; feed yang tidak berubah (304) dilewati.
+    Validator baru disimpan ke file state hanya setelah body selesai dibaca,
+    jadi fetch yang terputus akan diulang penuh di siklus berikutnya.
+    """
+
+    def __init__(self, urls, state_path=DEFAULT_STATE_FILE, session=None, timeout=30):
+        self.urls = list(urls)
+        self.state_path = state_path
+        self.session = session or requests.Session()
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self.state = {}
+        self.stats = {"fetched": 0, "unchanged": 0, "failed": 0, "links": 0}
+        self.load()
+
+    def load(self):
+        if not self.state_path or not os.path.exists(self.state_path):
+            return
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                self.state = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Gagal membaca state subscription {self.state_path}: {e}")
+            self.state = {}
+
+    def save(self):
+        if not self.state_path:
+            return
+        with self._lock:
+            data = json.dumps(self.state)
+        tmp = f"{self.state_path}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp, self.state_path)
+        except OSError as e:
+            print(f"Gagal menyimpan state subscription {self.state_path}: {e}")
+
+    def iter_links(self, url, conditional=True):
+        """Generator link dari satu feed. Kosong kalau feed tidak berubah atau gagal."""
+        headers = {}
+        cached = self.state.get(url) or {}
+        if conditional:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+        try:
+            r = self.session.get(url, headers=headers, stream=True, timeout=self.timeout)
+        except requests.RequestException as e:
+            logging.warning(f"[subscription] Gagal fetch {url}: {e}")
+            self.stats["failed"] += 1
+            return
+        with r:
+            if r.status_code == 304:
+                logging.info(f"[subscription] {url} tidak berubah, dilewati")
+                self.stats["unchanged"] += 1
+                return
+            if r.status_code != 200:
+                logging.warning(f"[subscription] {url} -> HTTP {r.status_code}")
+                self.stats["failed"] += 1
+                return
+            count = 0
+            try:
+                for link in iter_feed_links(r.iter_content(CHUNK_SIZE)):
+                    count += 1
+                    yield link
+            except (requests.RequestException, ValueError) as e:
+                logging.warning(f"[subscription] Body {url} gagal dibaca: {e}")
+                self.stats["failed"] += 1
+                return
+            self.stats["fetched"] += 1
+            self.stats["links"] += count
+            with self._lock:
+                self.state[url] = {
+                    "etag": r.headers.get("ETag"),
+                    "last_modified": r.headers.get("Last-Modified"),
+                    "links": count,
+                }
+        logging.info(f"[subscription] {url}: {count} link")
+
+    def links(self, conditional=True):
+        """Semua link dari semua feed, berurutan. State disimpan setelah selesai."""
+        for url in self.urls:
+            yield from self.iter_links(url, conditional)
+        self.save()
+
+    def convert(self, converter, conditional=True, **kwargs):
+        """Alirkan link feed langsung ke converter.convert_many -> (index, outbound, error)."""
+        return converter.convert_many(self.links(conditional), **kwargs)
@@ -0,0 +1,92 @@
+import logging
+import time
+
+from probe_engine import MODE_FULL, empty_result
+
+
+class TriageRunner:
+    """
+    Test dua fase untuk batch besar (kebanyakan link biasanya mati):
+    1. pre-screen: satu connect TCP dengan deadline pendek ke target /ip-port,
+       semua target sekaligus dengan concurrency tinggi;
+    2. detail: probe lengkap (geo, sampel latency, cek protokol TLS/WS) hanya
+       untuk target yang merespon di fase 1.
+    """
+
+    def __init__(self, tester, screen_timeout=1.0, screen_concurrency=None):
+        self.tester = tester
+        self.screen_timeout = screen_timeout
+        self.screen_concurrency = screen_concurrency
+        self.stats = {}
+
+    def run(self, targets, outbounds=None, prober=None):
+        """
+        Yield (index, result) begitu hasil akhir tiap target diketahui.
+        Target yang gagal pre-screen langsung dilaporkan DEAD. `prober` boleh
+        ProbeCoordinator supaya fase 2 juga dedup endpoint yang sama.
+        """
+        targets = list(targets)
+        prober = prober or self.tester
+        self.stats = stats = {
+            "screened": 0, "responders": 0, "screen_seconds": 0.0,
+            "detailed": 0, "detail_live": 0, "detail_seconds": 0.0,
+            "protocol_checked": 0, "protocol_failed": 0, "protocol_seconds": 0.0,
+        }
+
+        # Fase 1: endpoint unik saja
+        unique = list(dict.fromkeys(targets))
+        start = time.monotonic()
+        alive = set()
+        for uidx, connect_ms in self.tester.screen_many(unique, self.screen_timeout, self.screen_concurrency):
+            if connect_ms is not None:
+                alive.add(unique[uidx])
+        stats["screened"] = len(targets)
+        stats["screen_seconds"] = round(time.monotonic() - start, 3)
+        responders = []
+        for idx, target in enumerate(targets):
+            if target in alive:
+                responders.append(idx)
+            else:
+                result = empty_result(*target)
+                result["phase"] = 1
+                yield idx, result
+        stats["responders"] = len(responders)
+
+        # Fase 2: probe lengkap
+        start = time.monotonic()
+        live = {}
+        for j, result in prober.test_many([targets[i] for i in responders], mode=MODE_FULL):
+            idx = responders[j]
+            result["phase"] = 2
+            stats["detailed"] += 1
+            if result["status"] == "✅ LIVE" and outbounds is not None:
+                live[idx] = result
+            else:
+                stats["detail_live"] += result["status"] == "✅ LIVE"
+                yield idx, result
+        stats["detail_live"] += len(live)
+        stats["detail_seconds"] = round(time.monotonic() - start, 3)
+
+        if not live:
+            return
+        start = time.monotonic()
+        order = list(live)
+        for j, proto in prober.test_protocols([outbounds[i] for i in order]):
+            idx = order[j]
+            result = live[idx]
+            result.update(proto)
+            stats["protocol_checked"] += 1
+            if not proto["protocol_ok"]:
+                stats["protocol_failed"] += 1
+                result["status"] = "❌ DEAD"
+            yield idx, result
+        stats["protocol_seconds"] = round(time.monotonic() - start, 3)
+
+    def log_stats(self, prefix="[triage]"):
+        s = self.stats
+        logging.info(
+            f"{prefix} fase 1: {s.get('responders', 0)}/{s.get('screened', 0)} merespon "
+            f"({s.get('screen_seconds', 0)}s); fase 2: {s.get('detail_live', 0)}/{s.get('detailed', 0)} LIVE "
+            f"({s.get('detail_seconds', 0)}s); protokol: {s.get('protocol_failed', 0)}/{s.get('protocol_checked', 0)} "
+            f"gagal ({s.get('protocol_seconds', 0)}s)"
+        )
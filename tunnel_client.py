@@ -0,0 +1,220 @@
+import asyncio
+import hashlib
+import ipaddress
+import os
+import struct
+import time
+import uuid
+from urllib.parse import urlsplit
+
+from protocol_probe import open_transport, probe_profile
+
+DEFAULT_TEST_URL = "http://speed.cloudflare.com/__down?bytes=65536"
+MAX_DOWNLOAD = 1024 * 1024
+
+
+class RawStream:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    async def write(self, data):
+        self.writer.write(data)
+        await self.writer.drain()
+
+    async def read(self, n=65536):
+        return await self.reader.read(n)
+
+    def close(self):
+        self.writer.close()
+
+
+class WSStream:
+    """Framing WebSocket minimal (frame binary, client selalu masking)."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self._closed = False
+
+    async def write(self, data):
+        mask = os.urandom(4)
+        n = len(data)
+        if n < 126:
+            header = struct.pack("!BB", 0x82, 0x80 | n)
+        elif n < 65536:
+            header = struct.pack("!BBH", 0x82, 0x80 | 126, n)
+        else:
+            header = struct.pack("!BBQ", 0x82, 0x80 | 127, n)
+        masked = bytes(b ^ mask[i % 4] for i, b in enumerate(data))
+        self.writer.write(header + mask + masked)
+        await self.writer.drain()
+
+    async def read(self, n=65536):
+        while not self._closed:
+            try:
+                b1, b2 = await self.reader.readexactly(2)
+            except asyncio.IncompleteReadError:
+                self._closed = True
+                return b""
+            opcode = b1 & 0x0f
+            length = b2 & 0x7f
+            if length == 126:
+                (length,) = struct.unpack("!H", await self.reader.readexactly(2))
+            elif length == 127:
+                (length,) = struct.unpack("!Q", await self.reader.readexactly(8))
+            mask = await self.reader.readexactly(4) if b2 & 0x80 else None
+            payload = await self.reader.readexactly(length)
+            if mask:
+                payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+            if opcode == 0x8:
+                self._closed = True
+                return b""
+            if opcode == 0x9:
+                self.writer.write(struct.pack("!BB", 0x8a, 0x80 | len(payload)) + b"\x00" * 4 + payload)
+                continue
+            if opcode in (0x0, 0x1, 0x2) and payload:
+                return payload
+        return b""
+
+    def close(self):
+        self.writer.close()
+
+
+def socks_address(host, port, atyp_ipv4, atyp_domain, atyp_ipv6):
+    """Encode alamat tujuan (gaya SOCKS5) untuk header trojan/vless."""
+    try:
+        ip = ipaddress.ip_address(host)
+        if ip.version == 4:
+            return bytes([atyp_ipv4]) + ip.packed, struct.pack("!H", port)
+        return bytes([atyp_ipv6]) + ip.packed, struct.pack("!H", port)
+    except ValueError:
+        name = host.encode("idna")
+        return bytes([atyp_domain, len(name)]) + name, struct.pack("!H", port)
+
+
+def trojan_header(password, host, port):
+    addr, port_bytes = socks_address(host, port, 1, 3, 4)
+    digest = hashlib.sha224(password.encode()).hexdigest().encode()
+    return digest + b"\r\n" + b"\x01" + addr + port_bytes + b"\r\n"
+
+
+def vless_header(user_id, host, port):
+    addr, port_bytes = socks_address(host, port, 1, 2, 3)
+    return b"\x00" + uuid.UUID(user_id).bytes + b"\x00" + b"\x01" + port_bytes + addr
+
+
+def http_request(url):
+    parts = urlsplit(url)
+    path = parts.path or "/"
+    if parts.query:
+        path += "?" + parts.query
+    port = parts.port or 80
+    host_header = parts.hostname if port == 80 else f"{parts.hostname}:{port}"
+    request = (
+        f"GET {path} HTTP/1.1\r\n"
+        f"Host: {host_header}\r\n"
+        "User-Agent: Mozilla/5.0\r\n"
+        "Accept: */*\r\n"
+        "Connection: close\r\n"
+        "\r\n"
+    ).encode()
+    return parts.hostname, port, request
+
+
+async def fetch_via_tunnel(outbound, url=DEFAULT_TEST_URL, timeout=10, address=None, max_bytes=MAX_DOWNLOAD):
+    """
+    Buka tunnel trojan / vless (TCP+TLS atau WebSocket) memakai field outbound
+    dari VPNConverter, lalu GET `url` (http biasa) lewat tunnel.
+    Return dict: tunnel_ok, http_status, connect_ms, tls_ms, upgrade_ms,
+    handshake_ms, ttfb_ms, bytes, throughput_bps, tunnel_error.
+    """
+    result = {"tunnel_ok": False, "http_status": None, "handshake_ms": None, "ttfb_ms": None,
+              "bytes": 0, "throughput_bps": None, "tunnel_error": None}
+    timings = {}
+    stream = None
+    try:
+        proto = outbound.get("type")
+        if proto not in ("trojan", "vless"):
+            raise ValueError(f"tipe {proto} belum didukung")
+        dst_host, dst_port, request = http_request(url)
+        profile = probe_profile(outbound)
+        reader, writer, _ = await open_transport(profile, timeout, address, timings)
+        stream = WSStream(reader, writer) if profile["ws_path"] else RawStream(reader, writer)
+
+        if proto == "trojan":
+            header = trojan_header(outbound.get("password", ""), dst_host, dst_port)
+        else:
+            header = vless_header(outbound.get("uuid", ""), dst_host, dst_port)
+        start = time.perf_counter()
+        await stream.write(header + request)
+
+        buf = await asyncio.wait_for(stream.read(), timeout)
+        if proto == "vless":
+            # Respons vless: versi (1 byte) + panjang addons (1 byte) + addons
+            while len(buf) < 2:
+                more = await asyncio.wait_for(stream.read(), timeout)
+                if not more:
+                    raise ConnectionError("tunnel ditutup sebelum respons vless")
+                buf += more
+            result["handshake_ms"] = (time.perf_counter() - start) * 1000
+            buf = buf[2 + buf[1]:]
+            while not buf:
+                buf = await asyncio.wait_for(stream.read(), timeout)
+                if not buf:
+                    raise ConnectionError("tunnel ditutup sebelum respons HTTP")
+        if not buf:
+            raise ConnectionError("tunnel ditutup sebelum respons HTTP")
+        first_byte = time.perf_counter()
+        result["ttfb_ms"] = (first_byte - start) * 1000
+
+        while b"\r\n\r\n" not in buf:
+            more = await asyncio.wait_for(stream.read(), timeout)
+            if not more:
+                break
+            buf += more
+        head, _, body = buf.partition(b"\r\n\r\n")
+        status_line = head.split(b"\r\n", 1)[0].split()
+        result["http_status"] = int(status_line[1]) if len(status_line) > 1 and status_line[1].isdigit() else None
+        expected = None
+        for line in head.split(b"\r\n")[1:]:
+            if line.lower().startswith(b"content-length:"):
+                expected = int(line.split(b":", 1)[1].strip() or 0)
+        received = len(body)
+        limit = min(expected, max_bytes) if expected is not None else max_bytes
+        while received < limit:
+            chunk = await asyncio.wait_for(stream.read(), timeout)
+            if not chunk:
+                break
+            received += len(chunk)
+        elapsed = time.perf_counter() - first_byte
+        result["bytes"] = received
+        if received and elapsed > 0:
+            result["throughput_bps"] = round(received / elapsed)
+        result["tunnel_ok"] = result["http_status"] is not None and result["http_status"] < 500
+    except asyncio.TimeoutError:
+        result["tunnel_error"] = "timeout"
+    except (OSError, ValueError, ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError) as e:
+        result["tunnel_error"] = str(e) or e.__class__.__name__
+    finally:
+        if stream is not None:
+            stream.close()
+    result.update(timings)
+    return result
+
+
+async def fetch_many(outbounds, url=DEFAULT_TEST_URL, concurrency=50, timeout=10):
+    """Async generator: yield (index, result) sesuai urutan selesai."""
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(idx, outbound):
+        async with sem:
+            return idx, await fetch_via_tunnel(outbound, url, timeout)
+
+    tasks = [asyncio.ensure_future(one(i, o)) for i, o in enumerate(outbounds)]
+    try:
+        for fut in asyncio.as_completed(tasks):
+            yield await fut
+    finally:
+        for task in tasks:
+            task.cancel()
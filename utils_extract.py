@@ -1,11 +1,13 @@
-import re
-import socket
+import dns_cache
+from endpoint import PATH_IP_PORT, PATH_HOST_PORT
 
 def resolve_ip(host):
-    try:
-        return socket.gethostbyname(host)
-    except Exception:
-        return host  # fallback: kembalikan host apa adanya jika gagal
+    # Lewat cache DNS bersama (TTL + negative cache), bukan gethostbyname tiap link
+    return dns_cache.resolve(host) or host  # fallback: kembalikan host apa adanya jika gagal
+
+def resolve_many(hosts):
+    """Resolve banyak host sekaligus (paralel). Return {host: ip}, host yang gagal tetap apa adanya."""
+    return {h: ip or h for h, ip in dns_cache.resolve_many(hosts).items()}
 
 def ensure_path_ip_port(path):
     """
@@ -13,10 +15,10 @@ def ensure_path_ip_port(path):
     Jika path masih /domain-port, resolve ke ip, dan return /ip-port.
     Jika gagal, return path as is.
     """
-    ip_port_match = re.match(r'/(\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})-(\d+)', path)
+    ip_port_match = PATH_IP_PORT.match(path)
     if ip_port_match:
         return path
-    domain_port_match = re.match(r'/([A-Za-z0-9\.\-]+)-(\d+)', path)
+    domain_port_match = PATH_HOST_PORT.match(path)
     if domain_port_match:
         domain = domain_port_match.group(1)
         port = domain_port_match.group(2)
@@ -29,10 +31,10 @@ def extract_ip_port_from_path(path):
     Return (ip, port) jika path /ip-port atau /domain-port (akan di-resolve).
     Jika gagal, return (None, None)
     """
-    ip_port_match = re.match(r'/(\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})-(\d+)', path)
+    ip_port_match = PATH_IP_PORT.match(path)
     if ip_port_match:
         return ip_port_match.group(1), ip_port_match.group(2)
-    domain_port_match = re.match(r'/([A-Za-z0-9\.\-]+)-(\d+)', path)
+    domain_port_match = PATH_HOST_PORT.match(path)
     if domain_port_match:
         domain = domain_port_match.group(1)
         port = domain_port_match.group(2)
@@ -1,101 +1,204 @@
 import re
 import socket
+import asyncio
+import threading
 import concurrent.futures
-import requests
 import subprocess
 import os
+import time
+import dns_cache
+from endpoint import iter_url_candidates
+from probe_engine import AsyncProbeEngine, empty_result, iter_async, socket_budget, MODE_FULL, MODE_LIVENESS
+from protocol_probe import probe_outbounds
+from tunnel_client import fetch_many, DEFAULT_TEST_URL
+from icmp_pinger import Pinger
+from geoip_db import http_fallback_enabled, open_database
+from geo_cache import GeoCache
+from geo_client import GeoClient
+from latency_stats import summarize
 
 class VPNTester:
     def __init__(self):
-       # self.ipapi_cache = {}
+        self.ipapi_cache = GeoCache()
         self.timeout = 5  # detik
         self.max_workers = 5
-        
+        self.pool_size = 32
+        # GeoIP lokal dulu, ip-api.com hanya fallback kalau IP tidak ada di database
+        self.geoip = open_database()
+        self.geo_http_fallback = http_fallback_enabled()
+        self.geo_client = GeoClient(timeout=self.timeout)
+        # Tiap probe memegang maks. 2 socket, jadi batasi sesuai RLIMIT_NOFILE
+        self.max_in_flight = min(500, max(1, socket_budget() // 2))
+        # Sampel handshake TCP per node untuk latency min/median/p90/jitter/loss
+        self.latency_samples = 5
+        self.sample_window = 1.0
+        self.pinger = Pinger()
+        self.engine = AsyncProbeEngine(deadline=self.timeout, geo_lookup=self.get_ip_info, pinger=self.pinger,
+                                       samples=self.latency_samples, sample_window=self.sample_window)
+        # Satu worker pool + satu event loop untuk seumur hidup tester
+        self._pool = concurrent.futures.ThreadPoolExecutor(max_workers=self.pool_size, thread_name_prefix="vpn-tester")
+        self._loop = None
+        self._loop_lock = threading.Lock()
+
+    def _get_loop(self):
+        with self._loop_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                loop.set_default_executor(self._pool)
+                threading.Thread(target=loop.run_forever, name="vpn-tester-loop", daemon=True).start()
+                self._loop = loop
+            return self._loop
+
+    def test_many(self, targets, max_in_flight=None, mode=MODE_FULL):
+        """
+        Test banyak (ip, port) sekaligus. Yield (index, result) begitu probe
+        selesai; index = posisi target di input.
+        """
+        return self.engine.iter_results(targets, max_in_flight or self.max_in_flight,
+                                        loop=self._get_loop(), mode=mode)
+
+    def screen_many(self, targets, timeout=1.0, max_in_flight=None):
+        """Yield (index, connect_ms atau None) dari satu connect cepat per target."""
+        targets = list(targets)
+        return iter_async(lambda: self.engine.screen_many(targets, timeout, max_in_flight), self._get_loop())
+
+    def test_protocols(self, outbounds, max_in_flight=None):
+        """
+        Probe protokol (TLS dengan SNI, upgrade WebSocket di transport.path)
+        untuk banyak outbound. Yield (index, result) begitu selesai.
+        """
+        outbounds = list(outbounds)
+        return iter_async(lambda: probe_outbounds(outbounds, max_in_flight or self.max_in_flight, self.timeout),
+                          self._get_loop())
+
+    def test_tunnels(self, outbounds, url=DEFAULT_TEST_URL, max_in_flight=50):
+        """
+        Test end-to-end: buka tunnel trojan/vless lalu ambil `url` lewat tunnel.
+        Yield (index, result) dengan timing connect/TLS/upgrade/handshake/TTFB dan bytes/detik.
+        """
+        outbounds = list(outbounds)
+        return iter_async(lambda: fetch_many(outbounds, url, max_in_flight, self.timeout * 2), self._get_loop())
+
+    def close(self):
+        with self._loop_lock:
+            if self._loop is not None:
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._loop = None
+        self._pool.shutdown(wait=False)
+        self.engine.close()
+
     def ekstrak_ip_port(self, url):
-        patterns = [
-            r'(?:%2F|/)(\d+\.\d+\.\d+\.\d+)-(\d+)',  # /IP-PORT atau %2FIP-PORT
-            r'@([\w\.-]+):(\d+)[/?]',  # @domain:port
-            r'host=([\w\.-]+).*?port=(\d+)',  # host=... port=...
-            r'server":"([^"]+).*?"server_port":(\d+)'  # JSON format
-        ]
-        for pattern in patterns:
-            match = re.search(pattern, url)
-            if match:
-                ip, port = match.group(1), match.group(2)
-                if not ip.replace('.', '').isdigit():
-                    try:
-                        ip = socket.gethostbyname(ip)
-                    except:
-                        continue
-                return ip, int(port)
+        # Kandidat yang host-nya gagal di-resolve dilewati, lanjut ke pola berikutnya
+        for host, port in iter_url_candidates(url):
+            if not host.replace('.', '').isdigit():
+                host = dns_cache.resolve(host)
+                if not host:
+                    continue
+            return host, port
         return None, None
 
     def get_ip_info(self, ip):
-        if ip in self.ipapi_cache:
-            return self.ipapi_cache[ip]
+        if self.geoip:
+            local = self.geoip.lookup(ip)
+            if local:
+                return local
+        if not self.geo_http_fallback:
+            return {'provider': 'Unknown', 'country': 'Unknown'}
+        cached = self.ipapi_cache.get(ip)
+        if cached:
+            return cached
+        future = self.geo_client.submit(ip)
+        # Hasil yang telat (mis. tertahan rate limit) tetap masuk cache; yang gagal
+        # dicatat "Unknown" sebentar supaya tidak menghabiskan kuota ip-api tiap siklus
+        future.add_done_callback(lambda f: self._cache_geo(ip, f))
         try:
-            r = requests.get(f'http://ip-api.com/json/{ip}?fields=countryCode,isp', timeout=self.timeout)
-            if r.status_code == 200:
-                data = r.json()
-                result = {
-                    'provider': data.get('isp', 'Unknown')[:30],
-                    'country': data.get('countryCode', 'Unknown')
-                }
-                self.ipapi_cache[ip] = result
-                return result
-        except:
-            pass
+            result = future.result(timeout=self.timeout)
+        except Exception:
+            result = None
+        if result:
+            return result
         return {'provider': 'Unknown', 'country': 'Unknown'}
 
-    def test_connection(self, ip_port):
+    def _cache_geo(self, ip, future):
+        try:
+            result = future.result()
+        except Exception:
+            result = None
+        if result:
+            self.ipapi_cache.set(ip, result)
+        else:
+            self.ipapi_cache.set_unknown(ip)
+
+    def test_connection(self, ip_port, mode=MODE_FULL, deadline=None):
+        """
+        mode=MODE_LIVENESS: hanya TCP, selesai begitu ada port yang connect.
+        mode=MODE_FULL: TCP + ICMP + geo, semuanya dibatasi satu deadline per node.
+        """
         ip, port = ip_port
-        result = {
-            'ip': ip,
-            'port': port,
-            'icmp': '❌',
-            'tcp_443': '❌',
-            'tcp_custom': '❌',
-            'latency': 'N/A',
-            'provider': 'Unknown',
-            'country': 'Unknown',
-            'status': '❌ DEAD'
-        }
+        result = empty_result(ip, port)
+        end = time.monotonic() + (deadline or self.timeout)
         try:
-            with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-                future = executor.submit(self.get_ip_info, ip)
-                try:
-                    isp_info = future.result(timeout=self.timeout)
-                    result.update(isp_info)
-                except:
-                    pass
-            with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-                icmp_future = executor.submit(self._test_icmp, ip)
-                tcp443_future = executor.submit(self._test_tcp, ip, 443)
-                tcp_custom_future = executor.submit(self._test_tcp, ip, port)
-                try:
-                    icmp, latency = icmp_future.result(timeout=self.timeout)
-                    result['icmp'] = '✅' if icmp else '❌'
-                    if latency:
-                        result['latency'] = f"{latency:.2f} ms"
-                except:
-                    pass
-                try:
-                    if tcp443_future.result(timeout=self.timeout):
-                        result['tcp_443'] = '✅'
-                except:
-                    pass
-                try:
-                    if tcp_custom_future.result(timeout=self.timeout):
-                        result['tcp_custom'] = '✅'
-                except:
-                    pass
-            if '✅' in [result['tcp_443'], result['tcp_custom']]:
-                result['status'] = '✅ LIVE'
+            futures = {self._pool.submit(self._test_tcp_timed, ip, 443): 'tcp_443'}
+            if mode == MODE_FULL and self.latency_samples > 1:
+                futures[self._pool.submit(self._tcp_samples, ip, port, end - 0.05)] = 'samples'
+            else:
+                futures[self._pool.submit(self._test_tcp_timed, ip, port)] = 'tcp_custom'
+            if mode == MODE_FULL:
+                futures[self._pool.submit(self.get_ip_info, ip)] = 'geo'
+                futures[self._pool.submit(self._test_icmp, ip)] = 'icmp'
+            pending = set(futures)
+            connect_ms = None
+            while pending:
+                done, pending = concurrent.futures.wait(
+                    pending, timeout=max(0, end - time.monotonic()),
+                    return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                if not done:
+                    break
+                for future in done:
+                    name = futures[future]
+                    try:
+                        value = future.result()
+                    except Exception:
+                        continue
+                    if name == 'geo':
+                        result.update(value)
+                    elif name == 'icmp':
+                        icmp, latency = value
+                        result['icmp'] = '✅' if icmp else '❌'
+                        if latency:
+                            result['latency'] = f"{latency:.2f} ms"
+                    elif name == 'samples':
+                        sampled, sent = value
+                        result.update(summarize(sampled, sent))
+                        if sampled:
+                            result['tcp_custom'] = '✅'
+                            result['status'] = '✅ LIVE'
+                    elif value is not None:
+                        result[name] = '✅'
+                        result['status'] = '✅ LIVE'
+                        if connect_ms is None:
+                            connect_ms = value
+                if mode == MODE_LIVENESS and result['status'] == '✅ LIVE':
+                    break
+            # Berhenti menunggu sisa check; yang belum jalan dibatalkan
+            for future in pending:
+                future.cancel()
+            if connect_ms is not None and result['latency_median'] is None:
+                result.update(summarize([connect_ms], 1))
+            if result['latency_median'] is not None:
+                result['latency'] = f"{result['latency_median']:.2f} ms"
         except Exception as e:
             print(f"Error testing {ip}: {str(e)}")
         return result
 
     def _test_icmp(self, ip):
+        if self.pinger.available:
+            stats = self.pinger.ping(ip)
+            if stats['rtts']:
+                return True, sum(stats['rtts']) / len(stats['rtts'])
+            return False, None
+        # Fallback kalau socket ICMP tidak diizinkan sama sekali
         try:
             if os.name == 'nt':
                 command = ['ping', '-n', '3', '-w', '2000', ip]
@@ -109,17 +212,38 @@ class VPNTester:
             pass
         return False, None
 
-    def _test_tcp(self, ip, port):
+    def _test_tcp_timed(self, ip, port, timeout=2):
+        """Return waktu connect TCP dalam ms, atau None kalau gagal."""
         try:
-            try:
-                nc = subprocess.run(['nc', '-z', '-w', '2', ip, str(port)],
-                                  capture_output=True)
-                if nc.returncode == 0:
-                    return True
-            except:
-                pass
             with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                s.settimeout(2)
-                return s.connect_ex((ip, port)) == 0
+                s.settimeout(timeout)
+                start = time.perf_counter()
+                if s.connect_ex((ip, port)) == 0:
+                    return (time.perf_counter() - start) * 1000
         except:
-            return False
\ No newline at end of file
+            pass
+        return None
+
+    def _tcp_samples(self, ip, port, end=None):
+        """
+        Sampel handshake TCP berurutan, disebar merata di sample_window.
+        Total waktu dibatasi `end` (time.monotonic()), bukan per sampel.
+        """
+        interval = self.sample_window / self.latency_samples
+        start = time.monotonic()
+        end = end or start + self.timeout
+        samples = []
+        sent = 0
+        for i in range(self.latency_samples):
+            time.sleep(max(0, start + i * interval - time.monotonic()))
+            remaining = end - time.monotonic()
+            if remaining <= 0:
+                break
+            sent += 1
+            ms = self._test_tcp_timed(ip, port, min(2, remaining))
+            if ms is not None:
+                samples.append(ms)
+        return samples, sent
+
+    def _test_tcp(self, ip, port, timeout=2):
+        return self._test_tcp_timed(ip, port, timeout) is not None